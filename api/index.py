@@ -1,14 +1,23 @@
 from fastapi import FastAPI, Request, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import firebase_admin
 from firebase_admin import credentials, firestore, storage
 import os
+import asyncio
+from collections import OrderedDict
 from datetime import datetime, timedelta
 import json
+import re
 import time
 import pydantic
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # Optional binary encoding; JSON is always available
+    msgpack = None
 # from dotenv import load_dotenv
 
 # load_dotenv()
@@ -112,15 +121,39 @@ except Exception as e:
     print(f"Warning: Firebase initialization failed: {e}")
 
 
-def make_json_serializable(data):
-    """Recursively convert Firestore data to JSON-serializable format."""
-    if isinstance(data, dict):
-        return {k: make_json_serializable(v) for k, v in data.items()}
-    if isinstance(data, list):
-        return [make_json_serializable(item) for item in data]
-    if hasattr(data, 'isoformat'):
-        return data.isoformat()
-    return data
+MSGPACK_MEDIA_TYPE = 'application/x-msgpack'
+
+
+def encode_default(obj):
+    """Fallback encoder for values the fast encoders don't know (Firestore timestamps, dates)."""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that encodes Firestore data in a single pass with orjson."""
+
+    def render(self, content) -> bytes:
+        # OPT_NON_STR_KEYS keeps parity with json.dumps for int keys (e.g. periodDays buckets)
+        return orjson.dumps(content, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MsgPackResponse(Response):
+    """Compact binary response for clients that send Accept: application/x-msgpack."""
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, default=encode_default, use_bin_type=True)
+
+
+def serialized_response(content, request: Request | None = None, status_code: int = 200):
+    """Encode raw Firestore data for the client, choosing MessagePack or JSON from the Accept header."""
+    headers = {'Vary': 'Accept'}
+    accept = request.headers.get('accept', '') if request is not None else ''
+    if msgpack is not None and MSGPACK_MEDIA_TYPE in accept:
+        return MsgPackResponse(content, status_code=status_code, headers=headers)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
 
 
 def ensure_firebase():
@@ -153,28 +186,327 @@ def fetch_master_items():
     except Exception:
         return []
 
+def fetch_master_items_with_version():
+    """Fetches the master item list plus a version string that changes whenever the list is replaced."""
+    doc = db.collection('config').document('checklist_items').get()
+    if doc.exists:
+        version = doc.update_time.isoformat() if doc.update_time else ''
+        return doc.to_dict().get('items', []), version
+    return [], ''
+
+# -------- Photo metadata -------- #
+# checklists/<date>/photos/<item_id>/entries/<photo_id> holds one doc per uploaded photo;
+# the day doc only carries checked.<item>.<user>.photoCount for rendering.
+PHOTO_PAGE_MAX = 50
+
+
+def get_photos_collection(date, item_id):
+    """Returns the per-date, per-item photo metadata collection."""
+    return db.collection('checklists').document(date).collection('photos').document(item_id).collection('entries')
+
+def strip_photo_metadata(checked):
+    """Replaces legacy embedded photo arrays with photoCount so day reads stay small."""
+    for users_checked in (checked or {}).values():
+        for check_info in (users_checked or {}).values():
+            if isinstance(check_info, dict) and 'photos' in check_info:
+                check_info['photoCount'] = check_info.get('photoCount', 0) + len(check_info.pop('photos') or [])
+    return checked
+
+def drop_client_photo_fields(checked):
+    """Removes photo fields from a client-sent checked map; only upload_photo maintains them."""
+    for users_checked in (checked or {}).values():
+        for check_info in (users_checked or {}).values():
+            if isinstance(check_info, dict):
+                check_info.pop('photoCount', None)
+                check_info.pop('photos', None)
+    return checked
+
+# -------- Summary read cache -------- #
+# Calendars are assembled from per-month day aggregates (see fetch_month_aggregate) plus the
+# stored last completions, both cheap to read. The assembled calendars sit in an LRU keyed by
+# ('calendar', start, end, master_version, month_tokens, completions_version); concurrent identical
+# requests await one in-flight computation.
+# Every write bumps history_writes/<YYYY-MM>.writes, so instances that did not handle the write
+# see a new month token on their next read instead of serving a stale copy.
+# config/last_completions holds {item_id: 'YYYY-MM-DD'}, moved forward by writes.
+SUMMARY_CACHE_SIZE = 64
+WRITE_MARKER_COLLECTION = 'history_writes'
+summary_cache = OrderedDict()
+summary_inflight = {}
+
+
+def summary_key_covers_month(key, month):
+    _kind, start_date, end_date = key[:3]
+    return start_date[:7] <= month <= end_date[:7]
+
+def invalidate_summary_cache(date):
+    """Drops cached and in-flight summaries affected by a write to date (YYYY-MM-DD[_Line])."""
+    month = get_date_from_doc_id(date)[:7]
+    for key in [key for key in summary_cache if summary_key_covers_month(key, month)]:
+        del summary_cache[key]
+    # Detach in-flight computations so their (possibly stale) result is not cached
+    for key in [key for key in summary_inflight if summary_key_covers_month(key, month)]:
+        del summary_inflight[key]
+
+def finish_flight(key, task):
+    """Caches a finished computation unless a write invalidated it while it ran."""
+    if summary_inflight.get(key) is not task:
+        return
+    del summary_inflight[key]
+    if not task.cancelled() and task.exception() is None:
+        summary_cache[key] = task.result()
+        if len(summary_cache) > SUMMARY_CACHE_SIZE:
+            summary_cache.popitem(last=False)
+
+async def single_flight(key, compute):
+    """Returns the cached result for key, or runs compute() once for all concurrent callers."""
+    if key in summary_cache:
+        summary_cache.move_to_end(key)
+        return summary_cache[key]
+
+    task = summary_inflight.get(key)
+    if task is None:
+        # Firestore calls block; run them off the event loop so other callers can join this flight
+        task = asyncio.ensure_future(asyncio.to_thread(compute))
+        summary_inflight[key] = task
+        task.add_done_callback(lambda done: finish_flight(key, done))
+    # shield: one caller disconnecting must not cancel the shared computation
+    return await asyncio.shield(task)
+
 def get_date_from_doc_id(doc_id):
     """Extracts YYYY-MM-DD from doc_id, ignoring suffixes like _Line1."""
     return doc_id.split('_')[0]
 
+# -------- Monthly history archive -------- #
+# Closed months are folded into one checklist_archives/<YYYY-MM>[_<line>] doc per line:
+# { 'month', 'line', 'days': {'YYYY-MM-DD': compact checked map}, 'compactedAt' }
+# config/archive_state.compactedThrough marks the newest archived month; every month up to
+# and including it is served from archives, later days from the daily checklist docs.
+# Writes to an archived month list it in archive_state.dirtyMonths: it is read from the daily
+# docs again until the next compaction run re-archives it. archive_state.revision counts runs.
+ARCHIVE_COLLECTION = 'checklist_archives'
+MONTH_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+
+def get_line_from_doc_id(doc_id):
+    """Extracts the line suffix from doc_id ('' for legacy docs without one)."""
+    parts = doc_id.split('_', 1)
+    return parts[1] if len(parts) > 1 else ''
+
+def next_month(month):
+    """Returns the YYYY-MM following the given YYYY-MM."""
+    year, mon = (int(part) for part in month.split('-'))
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+def previous_month(month):
+    """Returns the YYYY-MM preceding the given YYYY-MM."""
+    year, mon = (int(part) for part in month.split('-'))
+    return f"{year - (mon == 1):04d}-{(mon - 2) % 12 + 1:02d}"
+
+def fetch_archive_state():
+    """Returns config/archive_state with defaults: compactedThrough ('' if nothing is archived yet), dirtyMonths, revision."""
+    doc = db.collection('config').document('archive_state').get()
+    state = {'compactedThrough': '', 'dirtyMonths': [], 'revision': 0}
+    if doc.exists:
+        state.update(doc.to_dict())
+    return state
+
+def is_month_archived(month, archive_state):
+    """True when month is served from its archive docs (compacted and not written to since)."""
+    compacted_through = archive_state['compactedThrough']
+    return bool(compacted_through) and month <= compacted_through and month not in archive_state['dirtyMonths']
+
+def fetch_month_writes(month):
+    """Returns how many writes a month's days have had (its cache freshness marker)."""
+    doc = db.collection(WRITE_MARKER_COLLECTION).document(month).get()
+    if doc.exists:
+        return doc.to_dict().get('writes', 0)
+    return 0
+
+def checked_item_ids(checked):
+    """IDs of items at least one user has checked in a checked map."""
+    return [
+        item_id for item_id, users_checked in (checked or {}).items()
+        if any(isinstance(check_info, dict) and check_info.get('checked') for check_info in (users_checked or {}).values())
+    ]
+
+def record_history_write(date, checked_items=(), unchecked_items=()):
+    """
+    Call after writing a day doc: bumps the month's write marker, drops cached summaries, marks an
+    archived month dirty and moves the stored last completions of the checked/unchecked items.
+    """
+    month = get_date_from_doc_id(date)[:7]
+    db.collection(WRITE_MARKER_COLLECTION).document(month).set({
+        'writes': firestore.Increment(1),
+        'lastUpdated': firestore.SERVER_TIMESTAMP
+    }, merge=True)
+    invalidate_summary_cache(date)
+    archive_state = fetch_archive_state()
+    if is_month_archived(month, archive_state):
+        db.collection('config').document('archive_state').set({
+            'dirtyMonths': firestore.ArrayUnion([month]),
+            'lastUpdated': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+        invalidate_month_aggregate(month)
+        archive_state = fetch_archive_state()
+    if checked_items or unchecked_items:
+        update_last_completions(get_date_from_doc_id(date), checked_items, unchecked_items, archive_state)
+
+def stream_doc_id_range(collection_name, start_id=None, end_id=None):
+    """Streams docs whose ID lies in [start_id, end_id] (suffixes like _Line1 included)."""
+    collection_ref = db.collection(collection_name)
+    query = collection_ref
+    if start_id:
+        query = query.where(filter=firestore.FieldFilter('__name__', '>=', collection_ref.document(start_id)))
+    if end_id:
+        # '~' sorts after '_' so YYYY-MM-DD_LineN IDs stay inside the range
+        query = query.where(filter=firestore.FieldFilter('__name__', '<=', collection_ref.document(end_id + '~')))
+    return query.stream()
+
+def compact_checked(checked):
+    """Strips a day's checked map down to what history reads need; photos become counts."""
+    compact = {}
+    for item_id, users_checked in (checked or {}).items():
+        compact_users = {}
+        for user, check_info in (users_checked or {}).items():
+            if not isinstance(check_info, dict):
+                continue
+            entry = {'checked': bool(check_info.get('checked'))}
+            if check_info.get('timestamp'):
+                entry['timestamp'] = check_info['timestamp']
+            if check_info.get('note'):
+                entry['note'] = check_info['note']
+            photo_count = check_info.get('photoCount', 0) + len(check_info.get('photos') or [])
+            if photo_count:
+                entry['photoCount'] = photo_count
+            compact_users[user] = entry
+        compact[item_id] = compact_users
+    return compact
+
+def iter_history_days(start_date=None, end_date=None):
+    """
+    Yields (date, line, checked) for every stored day in [start_date, end_date] (YYYY-MM-DD,
+    either bound optional), reading one archive doc per line for archived months and the
+    daily checklist docs only for months that have not been compacted (or were written to since).
+    """
+    archive_state = fetch_archive_state()
+    compacted_through = archive_state['compactedThrough']
+
+    if compacted_through and (not start_date or start_date[:7] <= compacted_through):
+        archive_end = compacted_through
+        if end_date and end_date[:7] < archive_end:
+            archive_end = end_date[:7]
+        for archive_doc in stream_doc_id_range(ARCHIVE_COLLECTION, start_date[:7] if start_date else None, archive_end):
+            archive = archive_doc.to_dict()
+            if archive.get('month') in archive_state['dirtyMonths']:
+                continue
+            for date, checked in archive.get('days', {}).items():
+                if (start_date and date < start_date) or (end_date and date > end_date):
+                    continue
+                yield date, archive.get('line', ''), checked
+
+        for month in sorted(archive_state['dirtyMonths']):
+            month_start = max(start_date or '', f"{month}-01")
+            month_end = min(end_date or '9999', f"{month}-31")
+            if month_start > month_end:
+                continue
+            for checklist_doc in stream_doc_id_range('checklists', month_start, month_end):
+                checklist_data = checklist_doc.to_dict() or {}
+                yield get_date_from_doc_id(checklist_doc.id), get_line_from_doc_id(checklist_doc.id), checklist_data.get('checked', {})
+
+    live_start = start_date
+    if compacted_through:
+        first_live_day = f"{next_month(compacted_through)}-01"
+        live_start = max(start_date or '', first_live_day)
+    if end_date and live_start and live_start > end_date:
+        return
+
+    for checklist_doc in stream_doc_id_range('checklists', live_start, end_date):
+        checklist_data = checklist_doc.to_dict() or {}
+        yield get_date_from_doc_id(checklist_doc.id), get_line_from_doc_id(checklist_doc.id), checklist_data.get('checked', {})
+
+def compact_month(month):
+    """Folds every daily doc of a month into one archive doc per line. Returns the archive IDs."""
+    days_by_line = {}  # {line: {date: compact checked}}
+    for checklist_doc in stream_doc_id_range('checklists', f"{month}-01", f"{month}-31"):
+        line = get_line_from_doc_id(checklist_doc.id)
+        checklist_data = checklist_doc.to_dict() or {}
+        days_by_line.setdefault(line, {})[get_date_from_doc_id(checklist_doc.id)] = compact_checked(checklist_data.get('checked', {}))
+
+    archive_ids = []
+    batch = db.batch()
+    for line, days in days_by_line.items():
+        archive_id = f"{month}_{line}" if line else month
+        batch.set(db.collection(ARCHIVE_COLLECTION).document(archive_id), {
+            'month': month,
+            'line': line,
+            'days': days,
+            'compactedAt': firestore.SERVER_TIMESTAMP
+        })
+        archive_ids.append(archive_id)
+    batch.commit()
+    # A re-compacted month may have changed; its analytics and summaries must be rebuilt
+    invalidate_month_aggregate(month)
+    invalidate_summary_cache(f"{month}-01")
+    return archive_ids
+
+def collect_last_completions():
+    """Builds {item_id: 'YYYY-MM-DD'} of the most recent day any user checked each item."""
+    last_completions = {}
+    for doc_date, _line, checked in iter_history_days():
+        for item_id, users_checked in checked.items():
+            if users_checked:
+                # YYYY-MM-DD strings compare chronologically
+                if item_id not in last_completions or doc_date > last_completions[item_id]:
+                    last_completions[item_id] = doc_date
+    return last_completions
+
+def rebuild_last_completions():
+    """Rescans history into config/last_completions (first use and each compaction run)."""
+    last_completions = collect_last_completions()
+    db.collection('config').document('last_completions').set({
+        'items': last_completions,
+        'lastUpdated': firestore.SERVER_TIMESTAMP
+    })
+    return last_completions
+
+def fetch_last_completions():
+    """Returns the stored {item_id: 'YYYY-MM-DD'} last completions, building them on first use."""
+    doc = db.collection('config').document('last_completions').get()
+    if doc.exists:
+        return doc.to_dict().get('items', {})
+    return rebuild_last_completions()
+
+def update_last_completions(day, checked_items, unchecked_items, archive_state):
+    """
+    Moves stored last completions for a write to day (YYYY-MM-DD): a check only moves an item
+    forward; unchecking the day that is an item's last completion looks it up again in the month
+    aggregates (another user or line may still have it checked that day).
+    """
+    doc = db.collection('config').document('last_completions').get()
+    if not doc.exists:
+        return  # Built from history on the next read
+    stored = doc.to_dict().get('items', {})
+
+    changes = {}
+    for item_id in checked_items:
+        if stored.get(item_id, '') < day:
+            changes[item_id] = day
+    for item_id in unchecked_items:
+        if stored.get(item_id) == day:
+            last_completed = find_last_completion(item_id, day[:7], archive_state)
+            changes[item_id] = last_completed.isoformat() if last_completed else firestore.DELETE_FIELD
+
+    if changes:
+        db.collection('config').document('last_completions').set({
+            'items': changes,
+            'lastUpdated': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+
 def fetch_all_last_completions():
     """Fetches the last completion date for each task across all dates (same as /api/checklist/last-completions)."""
     try:
-        checklists_ref = db.collection('checklists')
-        all_checklists = checklists_ref.stream()
-
-        last_completions = {}  # {item_id: 'YYYY-MM-DD'}
-
-        for checklist_doc in all_checklists:
-            checklist_data = checklist_doc.to_dict()
-            checked = checklist_data.get('checked', {})
-            doc_date = get_date_from_doc_id(checklist_doc.id)
-
-            for item_id, users_checked in checked.items():
-                if users_checked:
-                    if item_id not in last_completions or doc_date > last_completions[item_id]:
-                        last_completions[item_id] = doc_date
-        return last_completions
+        return fetch_last_completions()
     except Exception:
         return {}
 
@@ -183,8 +515,15 @@ async def health():
     return JSONResponse({"status": "ok"})
 
 
+def drop_empty_items(checked):
+    """Removes item maps left empty after their last user unchecked (field deletes keep the parent map)."""
+    for item_id in [item_id for item_id, users_checked in (checked or {}).items() if not users_checked]:
+        del checked[item_id]
+    return checked
+
+
 @app.get('/api/checklist')
-async def get_checklist(date: str | None = None):
+async def get_checklist(request: Request, date: str | None = None):
     """Get checklist items for a specific date."""
     if not date:
         date = datetime.now().strftime('%Y-%m-%d')
@@ -197,13 +536,14 @@ async def get_checklist(date: str | None = None):
 
         if doc.exists:
             data = doc.to_dict()
-            return JSONResponse(make_json_serializable(data))
+            drop_empty_items(strip_photo_metadata(data.get('checked')))
+            return serialized_response(data, request)
         else:
-            return JSONResponse({
+            return serialized_response({
                 'date': date,
                 'items': [],
                 'checked': {}
-            })
+            }, request)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -212,26 +552,33 @@ async def get_checklist(date: str | None = None):
 async def update_checklist(payload: dict):
     """Replace the checklist state for a date."""
     date = payload.get('date', datetime.now().strftime('%Y-%m-%d'))
-    items = payload.get('items', [])
-    checked = payload.get('checked', {})
+    # The client echoes back the photoCount it read (legacy photo arrays included); merging that
+    # over the stored count would double it
+    checked = drop_client_photo_fields(payload.get('checked', {}))
 
     try:
         ensure_firebase()
 
-        doc_ref = db.collection('checklists').document(date)
-        doc_ref.set({
+        doc_data = {
             'date': date,
-            'items': items,
             'checked': checked,
             'lastUpdated': firestore.SERVER_TIMESTAMP
-        }, merge=True)
+        }
+        # The client no longer sends the master list with every save; keep it only if given
+        if 'items' in payload:
+            doc_data['items'] = payload['items']
+
+        doc_ref = db.collection('checklists').document(date)
+        doc_ref.set(doc_data, merge=True)
+        # A merge never removes entries, so a submit can only add completions
+        record_history_write(date, checked_items=checked_item_ids(checked))
         return JSONResponse({"success": True})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
 @app.post('/api/checklist/toggle')
-async def toggle_check(data: dict):
+async def toggle_check(data: dict, request: Request):
     """Toggle a specific checklist item for a user and save an optional note."""
     date = data.get('date', datetime.now().strftime('%Y-%m-%d'))
     item_id = data.get('item_id')
@@ -267,6 +614,7 @@ async def toggle_check(data: dict):
             del checked[item_id][user]
             if not checked[item_id]:
                 del checked[item_id]
+            history_change = {'unchecked_items': [item_id]}
         else:
             # Checking the item
             checked[item_id][user] = {
@@ -275,24 +623,112 @@ async def toggle_check(data: dict):
                 # --- FIX 2: Added the 'note' field to the saved data ---
                 'note': note
             }
+            history_change = {'checked_items': [item_id]}
 
         checklist_data['checked'] = checked
         checklist_data['lastUpdated'] = firestore.SERVER_TIMESTAMP
         doc_ref.set(checklist_data)
+        record_history_write(date, **history_change)
 
         updated_doc = doc_ref.get()
         if updated_doc.exists:
             updated_data = updated_doc.to_dict()
-            serializable_checked = make_json_serializable(updated_data.get('checked', {}))
-            return JSONResponse({"success": True, "checked": serializable_checked})
+            checked = drop_empty_items(strip_photo_metadata(updated_data.get('checked', {})))
+            return serialized_response({"success": True, "checked": checked}, request)
         else:
-            return JSONResponse({"success": True, "checked": {}})
+            return serialized_response({"success": True, "checked": {}}, request)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# Field-level patches waiting to be flushed, keyed by checklist doc ID:
+# { doc_id: {'checked': {item_id: {user: {field: value} | DELETE_FIELD}}, 'future': Future, 'task': Task} }
+PATCH_COALESCE_SECONDS = 0.2
+PATCHABLE_FIELDS = ('checked', 'note', 'timestamp')
+pending_patches = {}
+
+
+def merge_pending_patch(checked_patch, item_id, user, fields):
+    """Fold one user's field changes into the pending patch; later edits win."""
+    users_patch = checked_patch.setdefault(item_id, {})
+    if fields.get('checked') is False:
+        # Unchecking removes the user's whole entry, dropping any queued field edits
+        users_patch[user] = firestore.DELETE_FIELD
+        return
+
+    current = users_patch.get(user)
+    if current is firestore.DELETE_FIELD:
+        if fields.get('checked') is not True:
+            # Editing a note of an entry unchecked in this window must not resurrect it
+            return
+        # Re-checked after an uncheck: write a full entry instead of the delete
+        current = {}
+        users_patch[user] = current
+    elif current is None:
+        current = {}
+        users_patch[user] = current
+    current.update(fields)
+
+
+async def flush_pending_patch(doc_id):
+    """Write every edit queued for a doc during the coalescing window as one merge."""
+    await asyncio.sleep(PATCH_COALESCE_SECONDS)
+    pending = pending_patches.pop(doc_id)
+    try:
+        # Nested dict + merge=True only touches the listed leaves, unlike the full-document POST
+        db.collection('checklists').document(doc_id).set({
+            'date': doc_id,
+            'checked': pending['checked'],
+            'lastUpdated': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+        record_history_write(
+            doc_id,
+            checked_items=[item_id for item_id, users_patch in pending['checked'].items()
+                           if any(isinstance(fields, dict) and fields.get('checked') for fields in users_patch.values())],
+            unchecked_items=[item_id for item_id, users_patch in pending['checked'].items()
+                             if any(fields is firestore.DELETE_FIELD for fields in users_patch.values())]
+        )
+        pending['future'].set_result(None)
+    except Exception as e:
+        pending['future'].set_exception(e)
+
+
+@app.patch('/api/checklist')
+async def patch_checklist(payload: dict):
+    """Update only the given checked.<item>.<user> fields (note, checked, timestamp)."""
+    date = payload.get('date', datetime.now().strftime('%Y-%m-%d'))
+    item_id = payload.get('item_id')
+    user = payload.get('user')
+
+    if not item_id or not user:
+        raise HTTPException(status_code=400, detail="Missing item_id or user")
+
+    fields = {key: payload[key] for key in PATCHABLE_FIELDS if key in payload}
+    if not fields:
+        raise HTTPException(status_code=400, detail=f"Nothing to update; expected one of {', '.join(PATCHABLE_FIELDS)}")
+    if fields.get('checked') is True and 'timestamp' not in fields:
+        fields['timestamp'] = firestore.SERVER_TIMESTAMP
+
+    try:
+        ensure_firebase()
+
+        # Coalesce rapid consecutive edits to the same doc into a single write
+        pending = pending_patches.get(date)
+        if pending is None:
+            pending = {'checked': {}, 'future': asyncio.get_running_loop().create_future()}
+            pending_patches[date] = pending
+            # Keep a reference so the flush task can't be garbage-collected before it runs
+            pending['task'] = asyncio.create_task(flush_pending_patch(date))
+        merge_pending_patch(pending['checked'], item_id, user, fields)
+
+        await asyncio.shield(pending['future'])
+        return JSONResponse({"success": True})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
 @app.get('/api/checklist/items')
-async def get_checklist_items():
+async def get_checklist_items(request: Request):
     """Return the master checklist item definitions."""
     try:
         ensure_firebase()
@@ -301,9 +737,9 @@ async def get_checklist_items():
         doc = doc_ref.get()
         if doc.exists:
             data = doc.to_dict()
-            return JSONResponse(make_json_serializable(data))
+            return serialized_response(data, request)
         else:
-            return JSONResponse({"items": []})
+            return serialized_response({"items": []}, request)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -326,6 +762,120 @@ async def set_checklist_items(payload: dict):
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+# -------- Master item search -------- #
+# Inverted index over the master list, rebuilt only when the list's version changes:
+# {'version', 'items': [sorted items], 'postings': {field: {value: set(positions)}}}
+ITEM_FACET_FIELDS = ('process', 'equipment', 'category', 'period')
+COMMON_EQUIPMENT = '공통'  # Common items match every vision type filter
+ITEM_PAGE_MAX = 500
+item_index_cache = {}
+
+
+def get_item_facet_value(item, field):
+    """Facet value as the checklist filters see it ('General' / 'custom' when unset)."""
+    if field == 'period':
+        return str(item['periodDays']) if item.get('periodDays') is not None else 'custom'
+    return item.get(field) or 'General'
+
+def item_sort_key(item):
+    """정합성 first, then period, process, vision type and sheet order (same as the checklist view)."""
+    period_days = item.get('periodDays')
+    return (
+        item.get('category') != '정합성',
+        period_days if period_days is not None else float('inf'),
+        (item.get('process') or '').lower(),
+        (item.get('equipment') or '').lower(),
+        item.get('order') or 0
+    )
+
+def build_item_index(items, version):
+    sorted_items = sorted(items, key=item_sort_key)
+    postings = {field: {} for field in ITEM_FACET_FIELDS}
+    for position, item in enumerate(sorted_items):
+        for field in ITEM_FACET_FIELDS:
+            postings[field].setdefault(get_item_facet_value(item, field), set()).add(position)
+    return {'version': version, 'items': sorted_items, 'postings': postings}
+
+def fetch_item_index():
+    """Returns the master item index, rebuilding it when the master list changed."""
+    global item_index_cache
+    items, version = fetch_master_items_with_version()
+    if item_index_cache.get('version') != version or not item_index_cache:
+        item_index_cache = build_item_index(items, version)
+    return item_index_cache
+
+def match_item_filter(postings, field, value):
+    """Positions matching one filter value."""
+    matched = postings[field].get(value, set())
+    if field == 'equipment' and value != COMMON_EQUIPMENT:
+        matched = matched | postings[field].get(COMMON_EQUIPMENT, set())
+    return matched
+
+
+@app.get('/api/checklist/items/search')
+async def search_checklist_items(
+    request: Request,
+    process: str = 'all',
+    equipment: str = 'all',
+    category: str = 'all',
+    period: str = 'all',
+    offset: int = 0,
+    limit: int = 200
+):
+    """
+    Return one page of master items matching the filters ('all' = no filter), in checklist order,
+    plus facet counts per field (each counted with the other fields' filters applied), the IDs of
+    every match (for checked counts), the unfiltered master list size and the master list version.
+    """
+    filters = {'process': process, 'equipment': equipment, 'category': category, 'period': period}
+    offset = max(offset, 0)
+    limit = max(1, min(limit, ITEM_PAGE_MAX))
+
+    try:
+        ensure_firebase()
+
+        index = fetch_item_index()
+        postings = index['postings']
+        all_positions = set(range(len(index['items'])))
+        matches = {
+            field: match_item_filter(postings, field, value)
+            for field, value in filters.items() if value != 'all'
+        }
+
+        def intersect_except(skip_field):
+            result = all_positions
+            for field, positions in matches.items():
+                if field != skip_field:
+                    result = result & positions
+            return result
+
+        facets = {}
+        for field in ITEM_FACET_FIELDS:
+            candidates = intersect_except(field)
+            # Count what selecting each value would return (공통 items count toward every vision type)
+            facets[field] = {
+                value: len(match_item_filter(postings, field, value) & candidates)
+                for value in postings[field]
+            }
+
+        positions = sorted(intersect_except(None))
+        page = [index['items'][position] for position in positions[offset:offset + limit]]
+        next_offset = offset + limit if offset + limit < len(positions) else None
+
+        return serialized_response({
+            'items': page,
+            'total': len(positions),
+            'ids': [index['items'][position].get('id') for position in positions],
+            'indexTotal': len(index['items']),
+            'version': index['version'],
+            'offset': offset,
+            'nextOffset': next_offset,
+            'facets': facets
+        }, request)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
 @app.post('/api/checklist/upload-photo')
 async def upload_photo(
     file: UploadFile = File(...),
@@ -358,53 +908,43 @@ async def upload_photo(
         # Get the public URL
         photo_url = blob.public_url
         
-        # Save photo URL to Firestore
-        doc_ref = db.collection('checklists').document(date)
-        doc = doc_ref.get()
-        
-        if doc.exists:
-            data = doc.to_dict()
-        else:
-            data = {'date': date, 'items': [], 'checked': {}}
-        
-        # Store photo URL in the checked item
-        if 'checked' not in data:
-            data['checked'] = {}
-        if item_id not in data['checked']:
-            data['checked'][item_id] = {}
-        if user not in data['checked'][item_id]:
-            data['checked'][item_id][user] = {
-                'timestamp': firestore.SERVER_TIMESTAMP,
-                'checked': True
-            }
-        
-        # Add photo URL to user's check data using ArrayUnion
-        from google.cloud.firestore import ArrayUnion
-        
+        # Photo metadata lives in its own per-date, per-item collection; the day doc only keeps a count
         current_time = datetime.utcnow().isoformat()
         photo_data = {
             'url': photo_url,
             'filename': file.filename,
+            'user': user,
+            'storage_path': filename,
             'uploaded_at': current_time
         }
-        
-        # Use update with ArrayUnion to add photo to the array
-        update_path = f'checked.{item_id}.{user}.photos'
+        photo_ref = get_photos_collection(date, item_id).document()
+        photo_ref.set(photo_data)
+
+        doc_ref = db.collection('checklists').document(date)
+        doc = doc_ref.get()
+        checked = (doc.to_dict() or {}).get('checked', {}) if doc.exists else {}
+
+        # A photo counts as checking the item when this user has no entry for it yet
+        user_update = {'photoCount': firestore.Increment(1)}
+        if user not in (checked.get(item_id) or {}):
+            user_update['checked'] = True
+            user_update['timestamp'] = firestore.SERVER_TIMESTAMP
+
         doc_ref.set({
             'checked': {
                 item_id: {
-                    user: {
-                        'photos': ArrayUnion([photo_data])
-                    }
+                    user: user_update
                 }
             },
             'lastUpdated': firestore.SERVER_TIMESTAMP
         }, merge=True)
+        record_history_write(date, checked_items=[item_id] if 'checked' in user_update else [])
         
         return JSONResponse({
             "success": True,
             "photo_url": photo_url,
-            "filename": filename
+            "filename": filename,
+            "photo": {'id': photo_ref.id, **photo_data}
         })
         
     except Exception as e:
@@ -414,149 +954,248 @@ async def upload_photo(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get('/api/checklist/photos')
+async def list_photos(request: Request, date: str, item_id: str, limit: int = 12, cursor: str | None = None):
+    """
+    List one page of photo metadata for an item on a date, oldest first.
+    Pass the returned nextCursor to fetch the following page.
+    """
+    limit = max(1, min(limit, PHOTO_PAGE_MAX))
+
+    try:
+        ensure_firebase()
+
+        photos = []
+        if not cursor:
+            # Photos uploaded before the move still sit inside the day doc; serve them on the first page
+            doc = db.collection('checklists').document(date).get()
+            if doc.exists:
+                users_checked = (doc.to_dict().get('checked') or {}).get(item_id) or {}
+                for user, check_info in users_checked.items():
+                    for photo in (check_info or {}).get('photos') or []:
+                        photos.append({'user': user, **photo})
+
+        photos_ref = get_photos_collection(date, item_id)
+        query = photos_ref.order_by('uploaded_at')
+        if cursor:
+            cursor_doc = photos_ref.document(cursor).get()
+            if not cursor_doc.exists:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.start_after(cursor_doc)
+
+        # Fetch one extra to know whether another page exists
+        page = list(query.limit(limit + 1).stream())
+        next_cursor = page[limit - 1].id if len(page) > limit else None
+        photos.extend({'id': photo_doc.id, **photo_doc.to_dict()} for photo_doc in page[:limit])
+
+        return serialized_response({'photos': photos, 'nextCursor': next_cursor}, request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
 @app.get('/api/checklist/last-completions')
-async def get_last_completions():
+async def get_last_completions(request: Request):
     """Get the last completion date for each task across all dates."""
     try:
         ensure_firebase()
 
-        # Query all checklist documents
-        checklists_ref = db.collection('checklists')
-        all_checklists = checklists_ref.stream()
+        last_completions = fetch_last_completions()
 
-        # Track last completion date for each item_id
-        last_completions = {}  # {item_id: 'YYYY-MM-DD'}
-
-        for checklist_doc in all_checklists:
-            checklist_data = checklist_doc.to_dict()
-            checked = checklist_data.get('checked', {})
-            # Fix: Handle suffixes in doc ID
-            doc_date = get_date_from_doc_id(checklist_doc.id)
-
-            # For each item that was checked, track the most recent date
-            for item_id, users_checked in checked.items():
-                if users_checked:  # If any user checked it
-                    # Check if this date is more recent than what we have
-                    if item_id not in last_completions:
-                        last_completions[item_id] = doc_date
-                    else:
-                        # Compare dates (YYYY-MM-DD format is sortable)
-                        if doc_date > last_completions[item_id]:
-                            last_completions[item_id] = doc_date
-
-        return JSONResponse({"lastCompletions": last_completions})
+        return serialized_response({"lastCompletions": last_completions}, request)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
-@app.get('/api/summary/calendar')
-async def get_calendar_summary(start_date: str, end_date: str):
+@app.post('/api/archive/compact')
+async def compact_history(payload: dict | None = None):
     """
-    Retrieves summary data (who submitted, how many checked) for all dates 
-    between start_date and end_date (YYYY-MM-DD), aggregating all lines (suffixed docs).
+    Folds closed months into monthly archive docs. With no 'month', compacts every month after
+    compactedThrough up to last month plus archived months written to since (dirtyMonths);
+    with 'month' (YYYY-MM), re-compacts just that closed month.
     """
+    payload = payload or {}
+    current_month = datetime.now().strftime('%Y-%m')
+    month = payload.get('month')
+
+    if month and not MONTH_PATTERN.match(str(month)):
+        raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    if month and month >= current_month:
+        raise HTTPException(status_code=400, detail="Only closed months (before the current month) can be compacted")
+
     try:
         ensure_firebase()
-        
-        # Get the total number of tasks to use as the denominator in the summary
-        master_items = fetch_master_items() # Master item definitions
-        last_completions = fetch_all_last_completions() # Last completion dates
-        total_master_items = fetch_master_item_count()
 
-        item_period_map = {item.get('id'): item.get('periodDays') for item in master_items}
+        archive_state = fetch_archive_state()
+        compacted_through = archive_state['compactedThrough']
+        dirty_months = set(archive_state['dirtyMonths'])
+        if month:
+            if not compacted_through or month > compacted_through:
+                raise HTTPException(status_code=400, detail=f"Compact everything through {month} first (omit 'month')")
+            months = [month]
+        else:
+            if compacted_through:
+                first_month = next_month(compacted_through)
+            else:
+                # First run: start from the oldest daily doc
+                oldest = next(iter(db.collection('checklists').order_by('__name__').limit(1).stream()), None)
+                first_month = get_date_from_doc_id(oldest.id)[:7] if oldest else current_month
+            months = sorted(dirty_months)
+            while first_month < current_month:
+                months.append(first_month)
+                first_month = next_month(first_month)
+
+        state_ref = db.collection('config').document('archive_state')
+        archived = {}
+        for closed_month in months:
+            if closed_month in dirty_months:
+                # Clear the flag first so a write landing mid-compaction marks the month dirty again
+                state_ref.set({'dirtyMonths': firestore.ArrayRemove([closed_month])}, merge=True)
+            archived[closed_month] = compact_month(closed_month)
+            # Advance the marker month by month so a failure midway leaves a consistent state
+            compacted_through = max(compacted_through, closed_month)
+            state_ref.set({
+                'compactedThrough': compacted_through,
+                'revision': firestore.Increment(1),
+                'lastUpdated': firestore.SERVER_TIMESTAMP
+            }, merge=True)
+
+        if archived:
+            # Re-derive from history so any last completion a racing write left behind is corrected
+            rebuild_last_completions()
+
+        return JSONResponse({"success": True, "compactedThrough": compacted_through, "archived": archived})
+    except HTTPException:
+        raise
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
 
-        # Convert string dates to datetime objects for comparison
-        start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        # Fetch ALL documents once to avoid N queries (optimization)
-        # Note: In a massive scale app, we would query by range filters, but here iteration is fine
-        checklists_ref = db.collection('checklists')
-        all_docs = checklists_ref.stream()
-        
-        # Organize docs by date key: { '2026-01-29': [doc1, doc2], ... }
-        docs_by_date = {}
-        for doc in all_docs:
-            date_part = get_date_from_doc_id(doc.id)
-            if date_part not in docs_by_date:
-                docs_by_date[date_part] = []
-            docs_by_date[date_part].append(doc)
-
-        current_dt = start_dt
-        summary_data = {}
-        
-        # Iterate through all days in the range
-        while current_dt <= end_dt:
-            date_str = current_dt.strftime('%Y-%m-%d')
-            
-            # Find relevant docs for this date (e.g. 2026-01-29, 2026-01-29_Line1, etc.)
-            relevant_docs = docs_by_date.get(date_str, [])
+@app.get('/api/archive/compact')
+async def compact_history_cron(request: Request):
+    """Scheduled compaction run (Vercel cron sends GET); same as POST without 'month'."""
+    cron_secret = os.environ.get('CRON_SECRET')
+    if cron_secret and request.headers.get('authorization') != f"Bearer {cron_secret}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return await compact_history({})
 
-            items_due_count = 0
-            period_due_counts = {}
+def build_calendar_summary(start_date, end_date, master_items, last_completions, archive_state, month_tokens=None):
+    """
+    Builds summary data (who submitted, how many checked) for all dates
+    between start_date and end_date (YYYY-MM-DD), aggregating all lines (suffixed docs).
+    Checks come from the cached per-month aggregates; only due counts are computed here.
+    """
+    # Get the total number of tasks to use as the denominator in the summary
+    total_master_items = len(master_items)
 
-            # Calculate Due Counts based on Period (Rule 3)
-            for item in master_items:
-                item_id = item.get('id')
-                period_days = item.get('periodDays')
-                
-                is_due = True
-                
-                if period_days is not None and period_days > 0:
-                    last_completion_date_str = last_completions.get(item_id)
-                    
-                    if last_completion_date_str:
-                        last_date_dt = datetime.strptime(last_completion_date_str, '%Y-%m-%d')
-                        days_since = (current_dt.date() - last_date_dt.date()).days
-
-                        if last_date_dt.date() < current_dt.date() and days_since < period_days:
-                            is_due = False
-
-                if is_due:
-                    items_due_count += 1
-                    period_due_counts[period_days] = period_due_counts.get(period_days, 0) + 1
-
-            day_summary = {
-                'submitted': False,
-                'total_checked': 0,
-                'users': {},  # {user_name: count}
-                'total_due': items_due_count if items_due_count > 0 else total_master_items,
-                'period_checks':{},
-                'period_due_counts': period_due_counts
-            }
+    item_period_map = {item.get('id'): item.get('periodDays') for item in master_items}
 
-            # Aggregate data from all matching documents (Line 1, Line 2, etc.)
-            if relevant_docs:
-                day_summary['submitted'] = True
-                total_checked = 0
-                period_checks = day_summary['period_checks']
-                
-                # To avoid double counting the same item checked by same user on different lines (unlikely but safe)
-                # we track unique item checks? Or just sum them up?
-                # Usually we want Total Check Actions.
-                
-                for doc in relevant_docs:
-                    data = doc.to_dict()
-                    if data and data.get('checked'):
-                        all_checked_items = data['checked']
-                        
-                        for item_id, user_data in all_checked_items.items():
-                            period_days = item_period_map.get(item_id, 0)
-
-                            for user_name, check_info in user_data.items():
-                                if check_info.get('checked'):
-                                    total_checked += 1
-                                    period_checks[period_days] = period_checks.get(period_days, 0) + 1
-                                    # Just count action once per item per doc
-                                    break 
+    # Convert string dates to datetime objects for comparison
+    start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    
+    # One aggregate per month in range: { line: {'items': {item_id: day_mask}, 'days': day_mask} }
+    aggregates = {}
+    month = start_date[:7]
+    while month <= end_date[:7]:
+        token = month_tokens.get(month) if month_tokens else None
+        aggregates[month] = fetch_month_aggregate(month, archive_state, token)
+        month = next_month(month)
+
+    current_dt = start_dt
+    summary_data = {}
+    
+    # Iterate through all days in the range
+    while current_dt <= end_dt:
+        date_str = current_dt.strftime('%Y-%m-%d')
+        
+        # Lines (e.g. 2026-01-29, 2026-01-29_Line1, etc.) that have a doc for this date
+        bit = 1 << (current_dt.day - 1)
+        relevant_lines = [line_agg for line_agg in aggregates[date_str[:7]].values() if line_agg['days'] & bit]
+
+        items_due_count = 0
+        period_due_counts = {}
+
+        # Calculate Due Counts based on Period (Rule 3)
+        for item in master_items:
+            item_id = item.get('id')
+            period_days = item.get('periodDays')
+            
+            is_due = True
+            
+            if period_days is not None and period_days > 0:
+                last_completion_date_str = last_completions.get(item_id)
                 
-                day_summary['total_checked'] = total_checked
+                if last_completion_date_str:
+                    last_date_dt = datetime.strptime(last_completion_date_str, '%Y-%m-%d')
+                    days_since = (current_dt.date() - last_date_dt.date()).days
+
+                    if last_date_dt.date() < current_dt.date() and days_since < period_days:
+                        is_due = False
+
+            if is_due:
+                items_due_count += 1
+                period_due_counts[period_days] = period_due_counts.get(period_days, 0) + 1
+
+        day_summary = {
+            'submitted': False,
+            'total_checked': 0,
+            'users': {},  # {user_name: count}
+            'total_due': items_due_count if items_due_count > 0 else total_master_items,
+            'period_checks':{},
+            'period_due_counts': period_due_counts
+        }
 
-            day_summary['total_due'] = sum(day_summary['period_due_counts'].values())
-            summary_data[date_str] = day_summary
+        # Aggregate data from all matching documents (Line 1, Line 2, etc.)
+        if relevant_lines:
+            day_summary['submitted'] = True
+            total_checked = 0
+            period_checks = day_summary['period_checks']
+            
+            # Count an item once per line doc, however many users checked it there
+            for line_agg in relevant_lines:
+                for item_id, mask in line_agg['items'].items():
+                    if mask & bit:
+                        period_days = item_period_map.get(item_id, 0)
+                        total_checked += 1
+                        period_checks[period_days] = period_checks.get(period_days, 0) + 1
             
-            current_dt += timedelta(days=1)
+            day_summary['total_checked'] = total_checked
+
+        day_summary['total_due'] = sum(day_summary['period_due_counts'].values())
+        summary_data[date_str] = day_summary
+        
+        current_dt += timedelta(days=1)
+
+    return {'summaryData': summary_data, 'totalMasterItems': total_master_items}
+
+
+@app.get('/api/summary/calendar')
+async def get_calendar_summary(request: Request, start_date: str, end_date: str):
+    """
+    Retrieves summary data for all dates between start_date and end_date (YYYY-MM-DD).
+    Concurrent identical requests share one computation. Results are cached per range, master-list
+    version, month freshness tokens and last-completions state, all re-read on every request.
+    """
+    try:
+        ensure_firebase()
 
-        return JSONResponse({'summaryData': summary_data, 'totalMasterItems': total_master_items})
+        master_items, master_version = fetch_master_items_with_version()
+        archive_state = fetch_archive_state()
+        month_tokens = {}
+        month = start_date[:7]
+        while month <= end_date[:7]:
+            month_tokens[month] = get_month_token(month, archive_state)
+            month = next_month(month)
+        last_completions = fetch_last_completions()
+        # Due counts depend on last completions, which a write to any month can move
+        completions_version = hash(frozenset(last_completions.items()))
+        key = ('calendar', start_date, end_date, master_version, tuple(month_tokens.items()), completions_version)
+        result = await single_flight(
+            key, lambda: build_calendar_summary(
+                start_date, end_date, master_items, last_completions, archive_state, month_tokens
+            )
+        )
+        return serialized_response(result, request)
         
     except Exception as e:
         print(f"Error fetching calendar summary: {e}")
@@ -565,7 +1204,7 @@ async def get_calendar_summary(start_date: str, end_date: str):
         return JSONResponse({"error": str(e)}, status_code=500)
 
 @app.get('/api/schedule')
-async def get_schedule(date: str):
+async def get_schedule(request: Request, date: str):
     """Get production schedule for all lines on a specific date."""
     try:
         ensure_firebase()
@@ -575,16 +1214,16 @@ async def get_schedule(date: str):
         
         if doc.exists:
             data = doc.to_dict()
-            return JSONResponse(make_json_serializable(data))
+            return serialized_response(data, request)
         else:
             # Return empty structure for all lines
-            return JSONResponse({
+            return serialized_response({
                 'date': date,
                 'Line1': {'status': 'pending', 'schedule': '', 'notes': '', 'updated_by': '', 'updated_at': ''},
                 'Line2': {'status': 'pending', 'schedule': '', 'notes': '', 'updated_by': '', 'updated_at': ''},
                 'Line3': {'status': 'pending', 'schedule': '', 'notes': '', 'updated_by': '', 'updated_at': ''},
                 'Line4': {'status': 'pending', 'schedule': '', 'notes': '', 'updated_by': '', 'updated_at': ''}
-            })
+            }, request)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
@@ -620,6 +1259,282 @@ async def save_schedule(payload: dict):
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+# -------- Completion analytics -------- #
+# Per-month aggregates: { line: {'items': {item_id: day_mask}, 'users': {user: checks}, 'days': day_mask} }
+# Bit (d - 1) of a day mask is set when the item (or any doc, for 'days') was checked on day d,
+# so counts are popcounts and overdue gaps come straight from the set bits.
+# Aggregates are cached here per month token: archived months by archive revision (and in
+# Firestore), live months by their write marker, so calendars and analytics share them.
+ANALYTICS_COLLECTION = 'analytics_months'
+LEGACY_LINE = 'default'  # Map key for docs without a _LineN suffix (Firestore keys can't be empty)
+PRODUCTION_LINES = ('Line1', 'Line2', 'Line3', 'Line4')  # Always reported, even with no activity
+analytics_month_cache = {}
+
+
+def month_day_dates(month, mask):
+    """Expands a day mask into date objects for that month."""
+    year, mon = (int(part) for part in month.split('-'))
+    dates = []
+    day = 1
+    while mask:
+        if mask & 1:
+            dates.append(datetime(year, mon, day).date())
+        mask >>= 1
+        day += 1
+    return dates
+
+def compute_month_aggregate(month):
+    """Folds one month of history into per-line day masks and per-user check counts in a single pass."""
+    aggregate = {}
+    for date, line, checked in iter_history_days(f"{month}-01", f"{month}-31"):
+        bit = 1 << (int(date[8:10]) - 1)
+        line_agg = aggregate.setdefault(line or LEGACY_LINE, {'items': {}, 'users': {}, 'days': 0})
+        line_agg['days'] |= bit
+        for item_id, users_checked in (checked or {}).items():
+            checkers = [user for user, check_info in (users_checked or {}).items()
+                        if isinstance(check_info, dict) and check_info.get('checked')]
+            if not checkers:
+                continue
+            line_agg['items'][item_id] = line_agg['items'].get(item_id, 0) | bit
+            for user in checkers:
+                line_agg['users'][user] = line_agg['users'].get(user, 0) + 1
+    return aggregate
+
+def get_month_token(month, archive_state):
+    """Changes whenever a month's aggregate may have changed, on this instance or another."""
+    if is_month_archived(month, archive_state):
+        return ('archive', archive_state['revision'])
+    return ('writes', fetch_month_writes(month))
+
+def fetch_month_aggregate(month, archive_state, token=None):
+    """Returns a month's aggregate, recomputed only when its month token changed."""
+    token = token or get_month_token(month, archive_state)
+    cached = analytics_month_cache.get(month)
+    if cached and cached[0] == token:
+        return cached[1]
+
+    if token[0] != 'archive':
+        # Read the marker before computing: a write landing meanwhile bumps it past this token
+        aggregate = compute_month_aggregate(month)
+        analytics_month_cache[month] = (token, aggregate)
+        return aggregate
+
+    doc_ref = db.collection(ANALYTICS_COLLECTION).document(month)
+    doc = doc_ref.get()
+    if doc.exists:
+        aggregate = doc.to_dict().get('lines', {})
+    else:
+        aggregate = compute_month_aggregate(month)
+        doc_ref.set({'month': month, 'lines': aggregate, 'computedAt': firestore.SERVER_TIMESTAMP})
+    analytics_month_cache[month] = (token, aggregate)
+    return aggregate
+
+def invalidate_month_aggregate(month):
+    """Drops a month's cached aggregate (after it is re-compacted)."""
+    analytics_month_cache.pop(month, None)
+    db.collection(ANALYTICS_COLLECTION).document(month).delete()
+
+def iter_month_aggregates_backwards(month, archive_state):
+    """Yields (month, aggregate) from month back to the oldest stored day's month."""
+    oldest = next(iter(db.collection('checklists').order_by('__name__').limit(1).stream()), None)
+    if oldest is None:
+        return
+    oldest_month = get_date_from_doc_id(oldest.id)[:7]
+    while month >= oldest_month:
+        yield month, fetch_month_aggregate(month, archive_state)
+        month = previous_month(month)
+
+def find_completions_before(month, pairs, archive_state):
+    """
+    Latest completion date per (line, item) pair before month, walking month aggregates backwards
+    (cached for archived months) until every pair is found or the oldest stored day is reached.
+    """
+    found = {}
+    missing = set(pairs)
+    if not missing:
+        return found
+    for earlier_month, aggregate in iter_month_aggregates_backwards(previous_month(month), archive_state):
+        for line_key, item_id in list(missing):
+            mask = aggregate.get(line_key, {}).get('items', {}).get(item_id, 0)
+            if mask:
+                found[(line_key, item_id)] = month_day_dates(earlier_month, mask)[-1]
+                missing.discard((line_key, item_id))
+        if not missing:
+            break
+    return found
+
+def find_last_completion(item_id, month, archive_state):
+    """Latest day in or before month that any line completed item_id, or None."""
+    for earlier_month, aggregate in iter_month_aggregates_backwards(month, archive_state):
+        mask = 0
+        for line_agg in aggregate.values():
+            mask |= line_agg['items'].get(item_id, 0)
+        if mask:
+            return month_day_dates(earlier_month, mask)[-1]
+    return None
+
+def get_bucket_key(month, bucket):
+    """Maps YYYY-MM to its month, quarter (YYYY-Qn) or year bucket label."""
+    if bucket == 'year':
+        return month[:4]
+    if bucket == 'quarter':
+        return f"{month[:4]}-Q{(int(month[5:7]) - 1) // 3 + 1}"
+    return month
+
+def completion_rate(completed, expected):
+    return round(completed / expected, 4) if expected else None
+
+def add_completion(totals, key, completed, expected):
+    entry = totals.setdefault(key, {'completed': 0, 'expected': 0.0})
+    entry['completed'] += completed
+    entry['expected'] += expected
+
+def finalize_completions(totals):
+    return {
+        key: {
+            'completed': round(entry['completed'], 2),
+            'expected': round(entry['expected'], 2),
+            'rate': completion_rate(entry['completed'], entry['expected'])
+        }
+        for key, entry in totals.items()
+    }
+
+
+@app.get('/api/analytics/completion')
+async def get_completion_analytics(
+    request: Request,
+    start_month: str,
+    end_month: str,
+    bucket: str = 'month',
+    line: str | None = None
+):
+    """
+    Completion rates per item, period, user and line over [start_month, end_month] (YYYY-MM),
+    grouped into month/quarter/year buckets, plus overdue streaks per item based on periodDays.
+    An item is expected (days in bucket / periodDays) times per bucket; completions are capped at that.
+    Checks aren't assigned to users in advance, so a user's rate is their checks over all checks
+    expected in the bucket (how much of the workload they carried); share is over checks actually made.
+    """
+    if bucket not in ('month', 'quarter', 'year'):
+        raise HTTPException(status_code=400, detail="bucket must be month, quarter or year")
+    if not MONTH_PATTERN.match(start_month) or not MONTH_PATTERN.match(end_month):
+        raise HTTPException(status_code=400, detail="start_month and end_month must be YYYY-MM")
+    if start_month > end_month:
+        raise HTTPException(status_code=400, detail="start_month must not be after end_month")
+
+    try:
+        ensure_firebase()
+
+        master_items = fetch_master_items()
+        item_period_map = {item.get('id'): max(item.get('periodDays') or 1, 1) for item in master_items}
+        today = datetime.now().date()
+        archive_state = fetch_archive_state()
+
+        # Read every month first so lines without any activity still get a rate (of 0)
+        months = []
+        month = start_month
+        while month <= end_month:
+            month_start = datetime.strptime(f"{month}-01", '%Y-%m-%d').date()
+            if month_start > today:
+                break
+            month_end = datetime.strptime(f"{next_month(month)}-01", '%Y-%m-%d').date() - timedelta(days=1)
+            days_in_month = (min(month_end, today) - month_start).days + 1
+            months.append((month, days_in_month, fetch_month_aggregate(month, archive_state)))
+            month = next_month(month)
+
+        if line:
+            line_keys = [line]
+        else:
+            seen_lines = {line_key for _month, _days, aggregate in months for line_key in aggregate}
+            line_keys = sorted(set(PRODUCTION_LINES) | seen_lines)
+
+        buckets = {}
+        completion_dates = {}  # {(line, item_id): [date, ...]} in chronological order
+        range_days = 0
+        empty_line = {'items': {}, 'users': {}, 'days': 0}
+
+        for month, days_in_month, aggregate in months:
+            range_days += days_in_month
+            bucket_data = buckets.setdefault(get_bucket_key(month, bucket), {
+                'days': 0, 'lines': {}, 'items': {}, 'periods': {}, 'users': {}
+            })
+            bucket_data['days'] += days_in_month
+
+            for line_key in line_keys:
+                line_agg = aggregate.get(line_key, empty_line)
+                for item_id, period_days in item_period_map.items():
+                    mask = line_agg['items'].get(item_id, 0)
+                    expected = days_in_month / period_days
+                    completed = min(bin(mask).count('1'), expected)
+                    add_completion(bucket_data['lines'], line_key, completed, expected)
+                    add_completion(bucket_data['items'], item_id, completed, expected)
+                    add_completion(bucket_data['periods'], period_days, completed, expected)
+                    if mask:
+                        completion_dates.setdefault((line_key, item_id), []).extend(month_day_dates(month, mask))
+                for user, checks in line_agg['users'].items():
+                    bucket_data['users'][user] = bucket_data['users'].get(user, 0) + checks
+
+        buckets_out = {}
+        for bucket_key, bucket_data in buckets.items():
+            total_checks = sum(bucket_data['users'].values())
+            total_expected = sum(entry['expected'] for entry in bucket_data['lines'].values())
+            buckets_out[bucket_key] = {
+                'days': bucket_data['days'],
+                'lines': finalize_completions(bucket_data['lines']),
+                'items': finalize_completions(bucket_data['items']),
+                'periods': finalize_completions(bucket_data['periods']),
+                'users': {
+                    user: {
+                        'checks': checks,
+                        'share': completion_rate(checks, total_checks),
+                        'rate': completion_rate(checks, total_expected)
+                    }
+                    for user, checks in bucket_data['users'].items()
+                }
+            }
+
+        # Overdue streaks: days past periodDays between consecutive completions (and up to range end),
+        # starting from the last completion before the range; items never done count from range start
+        range_start = datetime.strptime(f"{start_month}-01", '%Y-%m-%d').date()
+        range_end = min(datetime.strptime(f"{next_month(end_month)}-01", '%Y-%m-%d').date() - timedelta(days=1), today)
+        earlier_completions = find_completions_before(
+            start_month, [(line_key, item_id) for line_key in line_keys for item_id in item_period_map], archive_state
+        )
+        overdue = {}
+        for line_key in line_keys:
+            line_overdue = {}
+            for item_id, period_days in item_period_map.items():
+                dates = completion_dates.get((line_key, item_id), [])
+                last_before = earlier_completions.get((line_key, item_id))
+                previous = last_before or range_start - timedelta(days=1)
+                longest = 0
+                for completed_on in dates:
+                    longest = max(longest, (completed_on - previous).days - period_days)
+                    previous = completed_on
+                current = max((range_end - previous).days - period_days, 0)
+                last_completed = dates[-1] if dates else last_before
+                line_overdue[item_id] = {
+                    'lastCompleted': last_completed.isoformat() if last_completed else None,
+                    'longestOverdueDays': max(longest, current),
+                    'currentOverdueDays': current
+                }
+            overdue[line_key] = line_overdue
+
+        return serialized_response({
+            'startMonth': start_month,
+            'endMonth': end_month,
+            'bucket': bucket,
+            'days': range_days,
+            'buckets': buckets_out,
+            'overdue': overdue
+        }, request)
+    except Exception as e:
+        print(f"Error computing completion analytics: {e}")
+        import traceback
+        traceback.print_exc()
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
 # -------- Static asset helpers for local dev -------- #
 @app.get('/')
 async def index():
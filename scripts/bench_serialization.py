@@ -0,0 +1,95 @@
+"""
+Benchmark the API response serialization paths on a synthetic busy day document.
+Compares the old make_json_serializable + JSONResponse path against the
+single-pass orjson encoder and the optional MessagePack encoding.
+
+Usage: python scripts/bench_serialization.py [items] [users] [photos_per_user]
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from index import FastJSONResponse, MsgPackResponse, msgpack  # noqa: E402
+
+
+def make_json_serializable(data):
+    """The API's former encoding pass: recursively convert Firestore data to JSON-serializable values."""
+    if isinstance(data, dict):
+        return {k: make_json_serializable(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [make_json_serializable(item) for item in data]
+    if hasattr(data, 'isoformat'):
+        return data.isoformat()
+    return data
+
+
+def build_day_document(item_count, user_count, photos_per_user):
+    """Build a day document shaped like checklists/<date>_<line> with timestamps, notes and photos."""
+    now = datetime.now(timezone.utc)
+    items = [{
+        'id': f'item_{i}',
+        'process': '음극' if i % 2 else '양극',
+        'equipment': '공통',
+        'category': 'S/W',
+        'item': f'점검 항목 {i}',
+        'item_en': f'Inspection item {i}',
+        'text': f'점검 항목 {i}',
+        'periodDays': (1, 7, 30)[i % 3],
+        'order': i,
+    } for i in range(item_count)]
+
+    checked = {}
+    for item in items:
+        checked[item['id']] = {
+            f'user_{u}': {
+                'timestamp': now,
+                'checked': True,
+                'note': '특이사항 없음 / no issues found during inspection',
+                'photos': [{
+                    'url': f'https://storage.googleapis.com/bucket/checklist_photos/{item["id"]}/{u}_{p}.jpg',
+                    'filename': f'IMG_{p:04d}.jpg',
+                    'uploaded_at': now.isoformat(),
+                } for p in range(photos_per_user)],
+            } for u in range(user_count)
+        }
+
+    return {'date': now.strftime('%Y-%m-%d'), 'items': items, 'checked': checked, 'lastUpdated': now}
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    size = len(fn())
+    print(f"{label:<40} {seconds * 1000:8.3f} ms/op {size:>10,} bytes")
+    return seconds
+
+
+def main():
+    item_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    user_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    photos_per_user = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    number = 20
+
+    doc = build_day_document(item_count, user_count, photos_per_user)
+    print(f"Day document: {item_count} items x {user_count} users x {photos_per_user} photos")
+
+    baseline = bench(
+        'make_json_serializable + JSONResponse',
+        lambda: JSONResponse(make_json_serializable(doc)).body,
+        number,
+    )
+    fast = bench('FastJSONResponse (orjson)', lambda: FastJSONResponse(doc).body, number)
+    print(f"{'':<40} {baseline / fast:8.1f}x faster")
+
+    if msgpack is not None:
+        packed = bench('MsgPackResponse', lambda: MsgPackResponse(doc).body, number)
+        print(f"{'':<40} {baseline / packed:8.1f}x faster")
+    else:
+        print("msgpack not installed; skipping MessagePack encoding")
+
+
+if __name__ == '__main__':
+    main()
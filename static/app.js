@@ -38,14 +38,19 @@ let currentUser = localStorage.getItem('checklist_user') || '';
 let currentLine = localStorage.getItem('checklist_line') || 'Line1';
 let currentLang = localStorage.getItem('checklist_lang') || 'kr'; // 'kr' or 'en'
 
-let checklistItems = [];
+let checklistItems = []; // Items matching the current filters, fetched page by page
+let itemFacets = {}; // {process|equipment|category|period: {value: count}}
+let itemsTotal = 0;
+let matchingItemIds = []; // IDs of every item matching the filters, including pages not loaded yet
+let itemsNextOffset = null;
 let checkedItems = {};
 let lastCompletions = {}; 
 let filterProcess = 'all';
 let filterEquipment = 'all';
 let filterPeriod = 'all';
 let filterCategory = 'all';
-let uploadedPhotos = {};
+let photoCounts = {}; // {itemId: number} from checked.<item>.<user>.photoCount
+let uploadedPhotos = {}; // {itemId: {photos: [], nextCursor}} loaded lazily per gallery
 
 // DOM elements
 const dateInput = document.getElementById('date-input');
@@ -118,32 +123,147 @@ if (langBtn) {
 
 processFilterSelect.addEventListener('change', (e) => {
     filterProcess = e.target.value;
-    renderChecklist();
+    reloadChecklistItems();
 });
 
 equipmentFilterSelect.addEventListener('change', (e) => {
     filterEquipment = e.target.value;
-    renderChecklist();
+    reloadChecklistItems();
 });
 
 periodFilterSelect.addEventListener('change', (e) => {
     filterPeriod = e.target.value;
-    renderChecklist();
+    reloadChecklistItems();
 });
 
 categoryFilterSelect.addEventListener('change', (e) => {
     filterCategory = e.target.value;
-    renderChecklist();
+    reloadChecklistItems();
 });
 
-// Load item definitions
-async function loadChecklistItems() {
+const ITEM_FACET_FIELDS = ['process', 'equipment', 'category', 'period'];
+const ITEMS_PAGE_SIZE = 200; // Same as the search endpoint's default limit
+const COMMON_EQUIPMENT = '공통'; // Common items match every vision type filter
+
+// Load item definitions matching the current filters (server-side filtering, sorting and paging)
+async function fetchItemsPage(offset) {
+    const params = new URLSearchParams({
+        process: filterProcess,
+        equipment: filterEquipment,
+        category: filterCategory,
+        period: filterPeriod,
+        offset: offset
+    });
+    try {
+        const response = await fetch(`${API_BASE}/checklist/items/search?${params}`);
+        const data = await response.json();
+        if (!response.ok || data.error) {
+            throw new Error(data.error || data.detail || `HTTP ${response.status}`);
+        }
+        warmMasterListCache(data.version);
+        return data;
+    } catch (error) {
+        // Offline with a filter combination never fetched before: filter the cached master list here
+        const localData = await searchCachedItems(offset);
+        if (localData) {
+            return localData;
+        }
+        throw error;
+    }
+}
+
+// Keep the service worker's copy of the full master list current for offline filtering
+function warmMasterListCache(version) {
+    if (!version || localStorage.getItem('checklist_items_version') === version) return;
+    fetch(`${API_BASE}/checklist/items`)
+        .then(response => {
+            if (response.ok) localStorage.setItem('checklist_items_version', version);
+        })
+        .catch(() => {});
+}
+
+async function searchCachedItems(offset) {
     try {
         const response = await fetch(`${API_BASE}/checklist/items`);
         const data = await response.json();
+        if (!response.ok || !data.items) return null;
+        return searchItemsLocally(data.items, offset);
+    } catch (error) {
+        return null;
+    }
+}
+
+function getItemFacetValue(item, field) {
+    if (field === 'period') return item.periodDays != null ? String(item.periodDays) : 'custom';
+    return item[field] || 'General';
+}
+
+function itemMatchesFilter(item, field, value) {
+    if (value === 'all') return true;
+    const itemValue = getItemFacetValue(item, field);
+    return itemValue === value || (field === 'equipment' && value !== COMMON_EQUIPMENT && itemValue === COMMON_EQUIPMENT);
+}
+
+// 정합성 first, then period, process, vision type and sheet order
+function compareItems(a, b) {
+    const isConsistencyA = (a.category === '정합성');
+    const isConsistencyB = (b.category === '정합성');
+    if (isConsistencyA !== isConsistencyB) return isConsistencyA ? -1 : 1;
+
+    const periodA = a.periodDays != null ? a.periodDays : Number.MAX_SAFE_INTEGER;
+    const periodB = b.periodDays != null ? b.periodDays : Number.MAX_SAFE_INTEGER;
+    if (periodA !== periodB) return periodA - periodB;
+
+    const processA = (a.process || '').toLowerCase();
+    const processB = (b.process || '').toLowerCase();
+    if (processA !== processB) return processA.localeCompare(processB);
+
+    const equipmentA = (a.equipment || '').toLowerCase();
+    const equipmentB = (b.equipment || '').toLowerCase();
+    if (equipmentA !== equipmentB) return equipmentA.localeCompare(equipmentB);
+
+    return (a.order || 0) - (b.order || 0);
+}
+
+// Same response shape as /checklist/items/search, computed from the full master list
+function searchItemsLocally(allItems, offset) {
+    const filters = { process: filterProcess, equipment: filterEquipment, category: filterCategory, period: filterPeriod };
+    const matchesExcept = (item, skipField) =>
+        ITEM_FACET_FIELDS.every(field => field === skipField || itemMatchesFilter(item, field, filters[field]));
+
+    const facets = {};
+    ITEM_FACET_FIELDS.forEach(field => {
+        const candidates = allItems.filter(item => matchesExcept(item, field));
+        facets[field] = {};
+        new Set(allItems.map(item => getItemFacetValue(item, field))).forEach(value => {
+            facets[field][value] = candidates.filter(item => itemMatchesFilter(item, field, value)).length;
+        });
+    });
+
+    const matches = allItems.filter(item => matchesExcept(item, null)).sort(compareItems);
+    const nextOffset = offset + ITEMS_PAGE_SIZE < matches.length ? offset + ITEMS_PAGE_SIZE : null;
+    return {
+        items: matches.slice(offset, offset + ITEMS_PAGE_SIZE),
+        total: matches.length,
+        ids: matches.map(item => item.id),
+        indexTotal: allItems.length,
+        offset: offset,
+        nextOffset: nextOffset,
+        facets: facets
+    };
+}
+
+async function loadChecklistItems() {
+    try {
+        const data = await fetchItemsPage(0);
         
-        if (data.items && data.items.length > 0) {
-            checklistItems = data.items;
+        // indexTotal is the unfiltered master list size; filters matching nothing are not an error
+        if (data.indexTotal > 0) {
+            checklistItems = data.items || [];
+            itemsTotal = data.total || 0;
+            matchingItemIds = data.ids || [];
+            itemsNextOffset = data.nextOffset;
+            itemFacets = data.facets || {};
             populateFilters();
         } else {
             showError('No checklist items found. Please run the setup script first.');
@@ -157,6 +277,26 @@ async function loadChecklistItems() {
     }
 }
 
+// Re-query items after a filter change (checked state is unchanged)
+async function reloadChecklistItems() {
+    if (await loadChecklistItems()) {
+        renderChecklist();
+    }
+}
+
+async function loadMoreItems() {
+    if (itemsNextOffset == null) return;
+    try {
+        const data = await fetchItemsPage(itemsNextOffset);
+        checklistItems.push(...(data.items || []));
+        itemsNextOffset = data.nextOffset;
+        renderChecklist();
+    } catch (error) {
+        console.error('Error loading more items:', error);
+        showError('Failed to load checklist items: ' + error.message);
+    }
+}
+
 // Load user data
 async function loadChecklist() {
     showLoading();
@@ -178,19 +318,23 @@ async function loadChecklist() {
         
         const checklistData = await checklistResponse.json();
         checkedItems = checklistData.checked ? checklistData.checked : {};
+
+        // Edits still queued offline are not on the server (or in its cached copy) yet; show them anyway
+        const queuedMutations = await getQueuedMutations().catch(() => []);
+        queuedMutations
+            .filter(mutation => mutation.kind === 'patch' && mutation.body.date === getDocId())
+            .forEach(mutation => applyPatchToSnapshot(mutation.body, checkedItems));
         
-        // Load uploaded photos from checked items
+        // Only photo counts come with the day doc; galleries are fetched on demand
+        photoCounts = {};
         uploadedPhotos = {};
         if (checkedItems) {
             Object.keys(checkedItems).forEach(itemId => {
                 const users = checkedItems[itemId];
                 Object.keys(users).forEach(userName => {
                     const userData = users[userName];
-                    if (userData.photos && userData.photos.length > 0) {
-                        if (!uploadedPhotos[itemId]) {
-                            uploadedPhotos[itemId] = [];
-                        }
-                        uploadedPhotos[itemId].push(...userData.photos);
+                    if (userData.photoCount > 0) {
+                        photoCounts[itemId] = (photoCounts[itemId] || 0) + userData.photoCount;
                     }
                 });
             });
@@ -230,17 +374,18 @@ async function toggleCheck(itemId) {
         if (Object.keys(checkedItems[itemId]).length === 0) {
             delete checkedItems[itemId];
         }
-        // Just re-render without submitting to server
-        // The item will stay visible until submit button is pressed
         renderChecklist();
+        patchCheckedFields(itemId, { checked: false }, { checked: true });
     } else {
         // Checking - add the item
+        const timestamp = new Date().toISOString();
         checkedItems[itemId][activeUser] = {
-            timestamp: new Date().toISOString(),
+            timestamp: timestamp,
             checked: true,
             note: note
         };
         renderChecklist();
+        patchCheckedFields(itemId, { checked: true, timestamp: timestamp, note: note }, { checked: false });
     }
 }
 
@@ -248,11 +393,33 @@ async function toggleCheck(itemId) {
 function updateItemNote(itemId, note) {
     if (!currentUser) return;
     if (checkedItems[itemId] && checkedItems[itemId][currentUser]) {
+        const previousNote = checkedItems[itemId][currentUser].note || '';
+        if (previousNote === note) return;
         checkedItems[itemId][currentUser].note = note;
-        submitChecklist(false); 
+        patchCheckedFields(itemId, { note: note }, { note: previousNote });
     } 
 }
 
+// Save only the changed checked.<item>.<user> fields (no full submit, no reload).
+// `previous` holds the values this edit replaced, used for conflict reporting if it has to be queued offline.
+async function patchCheckedFields(itemId, fields, previous) {
+    try {
+        await sendOrQueueMutation({
+            kind: 'patch',
+            body: {
+                date: getDocId(),
+                item_id: itemId,
+                user: currentUser,
+                ...fields
+            },
+            previous: previous
+        });
+    } catch (error) {
+        console.error('Error saving checklist change:', error);
+        alert(currentLang === 'en' ? 'Failed to save change: ' + error.message : '변경 사항 저장 실패: ' + error.message);
+    }
+}
+
 // Submit Checklist
 async function submitChecklist(showAlert = true) {
     if (!currentUser) {
@@ -263,7 +430,6 @@ async function submitChecklist(showAlert = true) {
     
     const payload = {
         date: getDocId(),
-        items: checklistItems,
         checked: checkedItems
     };
 
@@ -293,76 +459,8 @@ async function submitChecklist(showAlert = true) {
 
 // Render Logic
 function renderChecklist() {
-    if (checklistItems.length === 0) {
-        checklistDiv.innerHTML = '<p class="text-center py-10 text-gray-500 text-lg">No checklist items available.</p>';
-        return;
-    }
-    
-    const actualToday = getTodayDate();
-
-    // Sort items
-    const sortedItems = [...checklistItems].sort((a, b) => {
-        // Priority 1: '정합성' category always first
-        const isConsistencyA = (a.category === '정합성');
-        const isConsistencyB = (b.category === '정합성');
-        if (isConsistencyA && !isConsistencyB) return -1;
-        if (!isConsistencyA && isConsistencyB) return 1;
-
-        // Priority 2: Period
-        const periodA = a.periodDays != null ? a.periodDays : Number.MAX_SAFE_INTEGER;
-        const periodB = b.periodDays != null ? b.periodDays : Number.MAX_SAFE_INTEGER;
-        if (periodA !== periodB) return periodA - periodB;
-
-        // Priority 3: Process -> Equipment (Vision Type) -> Order
-        const processA = (a.process || '').toLowerCase();
-        const processB = (b.process || '').toLowerCase();
-        if (processA !== processB) return processA.localeCompare(processB);
-
-        const equipmentA = (a.equipment || '').toLowerCase();
-        const equipmentB = (b.equipment || '').toLowerCase();
-        if (equipmentA !== equipmentB) return equipmentA.localeCompare(equipmentB);
-
-        return (a.order || 0) - (b.order || 0);
-    });
-
-    const filteredItems = sortedItems.filter(item => {
-        const itemCategory = item.category || 'General';
-        const itemProcess = item.process || 'General';
-        const itemEquipment = item.equipment || 'General'; // This is 'Vision Type' in Excel
-
-        const categoryMatches = filterCategory === 'all' || itemCategory === filterCategory;
-        const processMatches = filterProcess === 'all' || itemProcess === filterProcess;
-        
-        // Show items if they match the selected filter OR if they are '공통'
-        const equipmentMatches = filterEquipment === 'all' || itemEquipment === filterEquipment || itemEquipment === '공통';
-        
-        const periodValue = item.periodDays != null ? String(item.periodDays) : 'custom';
-        const periodMatches = filterPeriod === 'all' || periodValue === filterPeriod;
-        
-        const isAlreadyCheckedToday = checkedItems[item.id];
-        
-        // For today's date or future dates, show all items (don't filter by period)
-        // For past dates or already checked items, show them with filter conditions only
-        if (currentDate >= actualToday || isAlreadyCheckedToday || currentDate < actualToday) {
-            return categoryMatches && processMatches && equipmentMatches && periodMatches;
-        }
-        
-        // This block is now unreachable for current/future dates
-        const periodDays = item.periodDays;
-        if (periodDays != null && periodDays > 0) {
-            const lastCompletionDate = lastCompletions[item.id];
-            if (lastCompletionDate) {
-                const lastDate = new Date(lastCompletionDate + 'T00:00:00');
-                const today = new Date(currentDate + 'T00:00:00');
-                const daysSince = Math.floor((today - lastDate) / (1000 * 60 * 60 * 24));
-                
-                if (daysSince < periodDays) {
-                    return false; 
-                }
-            }
-        }
-        return categoryMatches && processMatches && equipmentMatches && periodMatches;
-    });
+    // Items arrive filtered and in display order from /checklist/items/search
+    const filteredItems = checklistItems;
     
     if (filteredItems.length === 0) {
         checklistDiv.innerHTML = '<p class="text-center py-10 text-gray-500 text-lg">No items match the selected filters.</p>';
@@ -425,26 +523,39 @@ function renderChecklist() {
             processClass = 'anode';
         }
 
-        const hasPhoto = uploadedPhotos[item.id] && uploadedPhotos[item.id].length > 0;
+        const photoCount = photoCounts[item.id] || 0;
+        const hasPhoto = photoCount > 0;
         const photoBtnText = hasPhoto ? (currentLang === 'en' ? '📷 Photo Added' : '📷 사진 추가됨') : (currentLang === 'en' ? '📷 Upload Photo' : '📷 사진 업로드');
         const photoBtnStyle = hasPhoto 
             ? 'background-color: #4CAF50; color: white; border: none; padding: 5px 10px; border-radius: 4px; cursor: pointer; margin-bottom: 5px;' 
             : 'background-color: #f0f0f0; border: 1px solid #ccc; padding: 5px 10px; border-radius: 4px; cursor: pointer; margin-bottom: 5px;';
 
-        // Generate photo gallery HTML (Tailwind CSS)
+        // Generate photo gallery HTML (Tailwind CSS) - thumbnails only once the gallery is opened
         let photoGalleryHtml = '';
         if (hasPhoto) {
-            photoGalleryHtml = '<div class="flex flex-wrap gap-2 mt-3">';
-            uploadedPhotos[item.id].forEach((photo, index) => {
-                photoGalleryHtml += `
-                    <img src="${escapeHtml(photo.url)}" 
-                         class="w-20 h-20 rounded-lg border border-gray-300 cursor-pointer object-cover hover:scale-110 hover:shadow-lg transition-all" 
-                         onclick="event.stopPropagation(); window.open('${escapeHtml(photo.url)}', '_blank')"
-                         title="${escapeHtml(photo.filename || 'Photo ' + (index + 1))}"
-                    />
-                `;
-            });
-            photoGalleryHtml += '</div>';
+            const gallery = uploadedPhotos[item.id];
+            const buttonClass = 'px-3 py-1 text-xs font-medium text-gray-700 bg-gray-100 border border-gray-300 rounded-lg hover:bg-gray-200';
+            if (!gallery) {
+                const showLabel = currentLang === 'en' ? `🖼️ Show photos (${photoCount})` : `🖼️ 사진 보기 (${photoCount})`;
+                photoGalleryHtml = `<div class="mt-3"><button type="button" class="${buttonClass}" onclick="loadPhotoPage('${item.id}')">${showLabel}</button></div>`;
+            } else {
+                photoGalleryHtml = '<div class="flex flex-wrap gap-2 mt-3">';
+                gallery.photos.forEach((photo, index) => {
+                    photoGalleryHtml += `
+                        <img src="${escapeHtml(photo.url)}" 
+                             loading="lazy"
+                             class="w-20 h-20 rounded-lg border border-gray-300 cursor-pointer object-cover hover:scale-110 hover:shadow-lg transition-all" 
+                             onclick="event.stopPropagation(); window.open('${escapeHtml(photo.url)}', '_blank')"
+                             title="${escapeHtml(photo.filename || 'Photo ' + (index + 1))}"
+                        />
+                    `;
+                });
+                if (gallery.nextCursor) {
+                    const moreLabel = currentLang === 'en' ? 'More photos' : '사진 더 보기';
+                    photoGalleryHtml += `<button type="button" class="${buttonClass}" onclick="loadPhotoPage('${item.id}')">${moreLabel}</button>`;
+                }
+                photoGalleryHtml += '</div>';
+            }
         }
 
         const hasNote = existingNote && existingNote.trim().length > 0;
@@ -581,13 +692,23 @@ function renderChecklist() {
             </div>
         `;
     }).join('');
+
+    if (itemsNextOffset != null) {
+        const moreLabel = currentLang === 'en' ? `Load more (${checklistItems.length}/${itemsTotal})` : `더 보기 (${checklistItems.length}/${itemsTotal})`;
+        checklistDiv.innerHTML += `
+            <button type="button" class="w-full px-4 py-3 text-sm font-medium text-gray-700 bg-gray-100 border border-gray-300 rounded-lg hover:bg-gray-200" onclick="loadMoreItems()">
+                ${moreLabel}
+            </button>
+        `;
+    }
     
     updateStats(filteredItems);
 }
 
 function updateStats(visibleItems) {
-    const total = visibleItems.length;
-    const checked = visibleItems.filter(item => checkedItems[item.id]).length;
+    const total = Math.max(itemsTotal, visibleItems.length);
+    // Count over all matching items, not just the pages loaded so far
+    const checked = matchingItemIds.filter(itemId => checkedItems[itemId]).length;
     const progress = total > 0 ? Math.round((checked / total) * 100) : 0;
     
     totalItemsSpan.textContent = total;
@@ -633,37 +754,31 @@ function formatPeriodLabel(periodDays) {
 }
 
 function populateFilters() {
-    const processSet = new Set();
-    const equipmentSet = new Set();
-    const periodSet = new Set();
-    const categorySet = new Set();
-
-    checklistItems.forEach(item => {
-        categorySet.add(item.category || 'General');
-        processSet.add(item.process || 'General');
-        equipmentSet.add(item.equipment || 'General');
-        const periodValue = item.periodDays != null ? String(item.periodDays) : 'custom';
-        periodSet.add(periodValue);
-    });
+    // Options and counts come from the server's facet counts
+    const withCount = (formatter, counts) => value => `${formatter(value)} (${counts[value] || 0})`;
+    const processCounts = itemFacets.process || {};
+    const equipmentCounts = itemFacets.equipment || {};
+    const categoryCounts = itemFacets.category || {};
+    const periodCounts = itemFacets.period || {};
 
     const allProcessesLabel = currentLang === 'en' ? 'All processes' : '모든 공정';
     const allTypesLabel = currentLang === 'en' ? 'All types' : '모든 타입';
     const allCategoriesLabel = currentLang === 'en' ? 'All categories' : '모든 카테고리';
     const allFrequenciesLabel = currentLang === 'en' ? 'All frequencies' : '모든 주기';
 
-    fillSelect(processFilterSelect, Array.from(processSet).sort(), allProcessesLabel, value => translateFilterValue(value));
-    fillSelect(equipmentFilterSelect, Array.from(equipmentSet).sort(), allTypesLabel, value => translateFilterValue(value));
-    fillSelect(categoryFilterSelect, Array.from(categorySet).sort(), allCategoriesLabel, value => translateFilterValue(value));
+    fillSelect(processFilterSelect, Object.keys(processCounts).sort(), allProcessesLabel, withCount(translateFilterValue, processCounts));
+    fillSelect(equipmentFilterSelect, Object.keys(equipmentCounts).sort(), allTypesLabel, withCount(translateFilterValue, equipmentCounts));
+    fillSelect(categoryFilterSelect, Object.keys(categoryCounts).sort(), allCategoriesLabel, withCount(translateFilterValue, categoryCounts));
 
-    const periodOptions = Array.from(periodSet).sort((a, b) => {
+    const periodOptions = Object.keys(periodCounts).sort((a, b) => {
         const numA = a === 'custom' ? Number.MAX_SAFE_INTEGER : parseInt(a, 10);
         const numB = b === 'custom' ? Number.MAX_SAFE_INTEGER : parseInt(b, 10);
         return numA - numB;
     });
-    fillSelect(periodFilterSelect, periodOptions, allFrequenciesLabel, value => {
+    fillSelect(periodFilterSelect, periodOptions, allFrequenciesLabel, withCount(value => {
         if (value === 'custom') return currentLang === 'en' ? 'Custom' : '커스텀';
         return formatPeriodLabel(parseInt(value, 10));
-    });
+    }, periodCounts));
 }
 
 function translateFilterValue(value) {
@@ -715,29 +830,27 @@ async function triggerPhotoUpload(itemId) {
             try {
                 showLoading();
                 
-                // Create FormData for file upload
-                const formData = new FormData();
-                formData.append('file', file);
-                formData.append('date', getDocId());
-                formData.append('item_id', itemId);
-                formData.append('user', currentUser);
-                
-                // Upload to server
-                const response = await fetch(`${API_BASE}/checklist/upload-photo`, {
-                    method: 'POST',
-                    body: formData
+                // Upload to server (queued with the file blob while offline)
+                const data = await sendOrQueueMutation({
+                    kind: 'photo',
+                    fields: {
+                        date: getDocId(),
+                        item_id: itemId,
+                        user: currentUser
+                    },
+                    file: file,
+                    filename: file.name
                 });
                 
-                const data = await response.json();
-                
                 if (data.success) {
-                    if (!uploadedPhotos[itemId]) {
-                        uploadedPhotos[itemId] = [];
+                    photoCounts[itemId] = (photoCounts[itemId] || 0) + 1;
+                    // Append to an already opened gallery; closed galleries fetch it when opened
+                    if (uploadedPhotos[itemId] && (data.queued || !uploadedPhotos[itemId].nextCursor)) {
+                        uploadedPhotos[itemId].photos.push({
+                            filename: file.name,
+                            url: data.queued ? URL.createObjectURL(file) : data.photo_url
+                        });
                     }
-                    uploadedPhotos[itemId].push({
-                        filename: file.name,
-                        url: data.photo_url
-                    });
                     
                     // Show preview
                     const reader = new FileReader();
@@ -770,7 +883,11 @@ async function triggerPhotoUpload(itemId) {
                     };
                     reader.readAsDataURL(file);
                     
-                    alert(currentLang === 'en' ? 'Photo uploaded successfully!' : '사진이 업로드되었습니다!');
+                    if (data.queued) {
+                        alert(currentLang === 'en' ? 'Offline: photo will upload when connection returns.' : '오프라인: 연결되면 사진이 업로드됩니다.');
+                    } else {
+                        alert(currentLang === 'en' ? 'Photo uploaded successfully!' : '사진이 업로드되었습니다!');
+                    }
                     renderChecklist();
                 } else {
                     throw new Error(data.error || 'Upload failed');
@@ -786,6 +903,30 @@ async function triggerPhotoUpload(itemId) {
     input.click();
 }
 
+// Fetch the next page of an item's photo gallery
+async function loadPhotoPage(itemId) {
+    const gallery = uploadedPhotos[itemId] || { photos: [], nextCursor: null };
+    const params = new URLSearchParams({ date: getDocId(), item_id: itemId });
+    if (gallery.nextCursor) {
+        params.set('cursor', gallery.nextCursor);
+    }
+
+    try {
+        const response = await fetch(`${API_BASE}/checklist/photos?${params}`);
+        const data = await response.json();
+        if (!response.ok || data.error) {
+            throw new Error(data.error || data.detail || `HTTP ${response.status}`);
+        }
+        gallery.photos.push(...(data.photos || []));
+        gallery.nextCursor = data.nextCursor || null;
+        uploadedPhotos[itemId] = gallery;
+        renderChecklist();
+    } catch (error) {
+        console.error('Error loading photos:', error);
+        alert(currentLang === 'en' ? 'Failed to load photos: ' + error.message : '사진 불러오기 실패: ' + error.message);
+    }
+}
+
 function toggleNoteBox(itemId) {
     const noteBox = document.getElementById(`note-input-${itemId}`);
     if (noteBox) {
@@ -853,6 +994,8 @@ function downloadCSV(csvContent, filename) {
 window.saveNoteOnly = saveNoteOnly;
 window.toggleNoteBox = toggleNoteBox;
 window.triggerPhotoUpload = triggerPhotoUpload;
+window.loadPhotoPage = loadPhotoPage;
+window.loadMoreItems = loadMoreItems;
 window.toggleCheck = toggleCheck;
 
 // Document Ready
@@ -876,21 +1019,23 @@ document.addEventListener('DOMContentLoaded', () => {
     if (downloadBtn) {
         downloadBtn.addEventListener('click', () => {
             const selectedDate = getDocId(); 
-            const itemMap = checklistItems.reduce((acc, item) => {
-                acc[item.id] = item;
-                return acc;
-            }, {});
-            
             const apiUrl = `${API_BASE}/checklist?date=${selectedDate}`;
     
-            fetch(apiUrl)
-                .then(response => {
-                    if (!response.ok) {
-                        throw new Error(`HTTP error! Status: ${response.status}`);
-                    }
-                    return response.json();
+            // Only the filtered items are loaded, so fetch the full master list for descriptions
+            Promise.all([fetch(apiUrl), fetch(`${API_BASE}/checklist/items`)])
+                .then(responses => {
+                    responses.forEach(response => {
+                        if (!response.ok) {
+                            throw new Error(`HTTP error! Status: ${response.status}`);
+                        }
+                    });
+                    return Promise.all(responses.map(response => response.json()));
                 })
-                .then(data => {
+                .then(([data, itemsData]) => {
+                    const itemMap = (itemsData.items || []).reduce((acc, item) => {
+                        acc[item.id] = item;
+                        return acc;
+                    }, {});
                     const csv = nestedToCSV(data.checked || {}, itemMap);
                     downloadCSV(csv, `checklist_checked_${selectedDate}.csv`);
                 })
@@ -0,0 +1,226 @@
+// Offline support: service worker registration + IndexedDB queue for mutations made without Wi-Fi
+const OFFLINE_DB_NAME = 'cs-checklist-offline';
+const OFFLINE_DB_VERSION = 1;
+const MUTATION_STORE = 'mutations';
+
+let offlineDbPromise = null;
+let replayInProgress = null;
+
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('sw.js').catch(error => {
+            console.error('Service worker registration failed:', error);
+        });
+    });
+}
+
+function openOfflineDb() {
+    if (!offlineDbPromise) {
+        offlineDbPromise = new Promise((resolve, reject) => {
+            const request = indexedDB.open(OFFLINE_DB_NAME, OFFLINE_DB_VERSION);
+            request.onupgradeneeded = () => {
+                // autoIncrement keys preserve the order mutations were made in
+                request.result.createObjectStore(MUTATION_STORE, { keyPath: 'id', autoIncrement: true });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+    return offlineDbPromise;
+}
+
+async function runMutationStore(mode, operation) {
+    const db = await openOfflineDb();
+    return new Promise((resolve, reject) => {
+        const tx = db.transaction(MUTATION_STORE, mode);
+        const request = operation(tx.objectStore(MUTATION_STORE));
+        tx.oncomplete = () => resolve(request ? request.result : undefined);
+        tx.onerror = () => reject(tx.error);
+    });
+}
+
+function getQueuedMutations() {
+    return runMutationStore('readonly', store => store.getAll());
+}
+
+function queueMutation(mutation) {
+    return runMutationStore('readwrite', store => store.add({ ...mutation, queuedAt: new Date().toISOString() }));
+}
+
+function removeQueuedMutation(id) {
+    return runMutationStore('readwrite', store => store.delete(id));
+}
+
+/**
+ * Sends a mutation, or queues it when offline (or when earlier edits are still queued, to keep order).
+ * mutation: { kind: 'patch', body, previous } | { kind: 'photo', fields, file, filename }
+ * @returns {Promise<Object>} The server response, or { success: true, queued: true }.
+ */
+async function sendOrQueueMutation(mutation) {
+    const pending = await getQueuedMutations().catch(() => []);
+
+    if (navigator.onLine && pending.length === 0) {
+        try {
+            return await sendMutation(mutation);
+        } catch (error) {
+            if (!(error instanceof TypeError)) {
+                throw error; // Server answered with an error; not a connectivity problem
+            }
+        }
+    }
+
+    await queueMutation(mutation);
+    updateOfflineBanner();
+    if (navigator.onLine) {
+        replayQueuedMutations();
+    }
+    return { success: true, queued: true };
+}
+
+async function sendMutation(mutation) {
+    let response;
+    if (mutation.kind === 'photo') {
+        const formData = new FormData();
+        Object.entries(mutation.fields).forEach(([key, value]) => formData.append(key, value));
+        formData.append('file', mutation.file, mutation.filename);
+        response = await fetch(`${API_BASE}/checklist/upload-photo`, { method: 'POST', body: formData });
+    } else {
+        response = await fetch(`${API_BASE}/checklist`, {
+            method: 'PATCH',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(mutation.body)
+        });
+    }
+
+    const data = await response.json();
+    if (!response.ok || !data.success) {
+        throw new Error(data.error || data.detail || `HTTP ${response.status}`);
+    }
+    return data;
+}
+
+/**
+ * Compares a queued edit's starting point with what the server holds now.
+ * Returns a description when someone else changed the same field meanwhile.
+ */
+function detectPatchConflict(mutation, serverChecked) {
+    const { item_id: itemId, user } = mutation.body;
+    const serverEntry = (serverChecked[itemId] || {})[user];
+    const conflicts = [];
+
+    Object.entries(mutation.previous || {}).forEach(([field, previousValue]) => {
+        const serverValue = field === 'checked' ? !!serverEntry : ((serverEntry && serverEntry[field]) || '');
+        const queuedValue = field === 'checked' ? mutation.body.checked : mutation.body[field];
+        if (serverValue !== previousValue && serverValue !== queuedValue) {
+            conflicts.push(`${itemId} (${user}) ${field}: server "${serverValue}" → queued "${queuedValue}"`);
+        }
+    });
+    return conflicts;
+}
+
+// Keep the per-date server snapshot in step with edits already replayed
+function applyPatchToSnapshot(body, serverChecked) {
+    const { item_id: itemId, user } = body;
+    if (body.checked === false) {
+        if (serverChecked[itemId]) {
+            delete serverChecked[itemId][user];
+            // An item nobody has checked must not linger as {} (which reads as checked)
+            if (Object.keys(serverChecked[itemId]).length === 0) delete serverChecked[itemId];
+        }
+        return;
+    }
+    serverChecked[itemId] = serverChecked[itemId] || {};
+    serverChecked[itemId][user] = { ...(serverChecked[itemId][user] || {}), ...body };
+}
+
+/**
+ * Replays queued mutations in order. Stops at the first network failure so order is preserved;
+ * edits the server rejects or that overwrote someone else's change are reported.
+ */
+function replayQueuedMutations() {
+    if (!replayInProgress) {
+        replayInProgress = doReplayQueuedMutations().finally(() => {
+            replayInProgress = null;
+            updateOfflineBanner();
+        });
+    }
+    return replayInProgress;
+}
+
+async function doReplayQueuedMutations() {
+    const serverCheckedByDate = {};
+    const conflicts = [];
+    const failures = [];
+    let replayed = false;
+
+    // Edits made during a replay are queued behind it, so keep going until the queue is empty
+    let mutations = await getQueuedMutations();
+    while (mutations.length > 0) {
+        replayed = true;
+        for (const mutation of mutations) {
+            try {
+                if (mutation.kind === 'patch') {
+                    const date = mutation.body.date;
+                    if (!serverCheckedByDate[date]) {
+                        const response = await fetch(`${API_BASE}/checklist?date=${date}`, { cache: 'no-store' });
+                        serverCheckedByDate[date] = (await response.json()).checked || {};
+                    }
+                    conflicts.push(...detectPatchConflict(mutation, serverCheckedByDate[date]));
+                }
+                await sendMutation(mutation);
+                if (mutation.kind === 'patch') {
+                    applyPatchToSnapshot(mutation.body, serverCheckedByDate[mutation.body.date]);
+                }
+            } catch (error) {
+                if (error instanceof TypeError) {
+                    return; // Connectivity lost again; keep the rest queued in order
+                }
+                failures.push(`${mutation.body ? mutation.body.item_id : mutation.fields.item_id}: ${error.message}`);
+            }
+            await removeQueuedMutation(mutation.id);
+        }
+        mutations = await getQueuedMutations();
+    }
+    if (!replayed) return;
+
+    if (conflicts.length > 0 || failures.length > 0) {
+        const lines = [];
+        if (conflicts.length > 0) {
+            lines.push(currentLang === 'en' ? 'Offline edits overwrote newer changes:' : '오프라인 수정이 최신 변경 사항을 덮어썼습니다:', ...conflicts);
+        }
+        if (failures.length > 0) {
+            lines.push(currentLang === 'en' ? 'Offline edits that could not be saved:' : '저장하지 못한 오프라인 수정:', ...failures);
+        }
+        alert(lines.join('\n'));
+    }
+
+    if (typeof loadChecklist === 'function') {
+        loadChecklist();
+    }
+}
+
+async function updateOfflineBanner() {
+    const banner = document.getElementById('offline-banner');
+    if (!banner) return;
+
+    const pending = await getQueuedMutations().catch(() => []);
+    if (!navigator.onLine || pending.length > 0) {
+        const status = navigator.onLine
+            ? (currentLang === 'en' ? 'Syncing' : '동기화 중')
+            : (currentLang === 'en' ? 'Offline' : '오프라인');
+        const queuedLabel = currentLang === 'en' ? `${pending.length} change(s) queued` : `대기 중인 변경 ${pending.length}건`;
+        banner.textContent = `${status} · ${queuedLabel}`;
+        banner.classList.remove('hidden');
+    } else {
+        banner.classList.add('hidden');
+    }
+}
+
+window.addEventListener('online', () => replayQueuedMutations());
+window.addEventListener('offline', () => updateOfflineBanner());
+window.addEventListener('load', () => {
+    updateOfflineBanner();
+    if (navigator.onLine) {
+        replayQueuedMutations();
+    }
+});
@@ -0,0 +1,126 @@
+// Service worker: offline app shell + cached API reads for the shop floor
+const CACHE_VERSION = 'v1';
+const SHELL_CACHE = `cs-checklist-shell-${CACHE_VERSION}`;
+const API_CACHE = `cs-checklist-api-${CACHE_VERSION}`;
+const MAX_CACHED_DAY_DOCS = 14 * 4; // Recent day documents kept for offline startup (14 days x 4 lines)
+const NETWORK_TIMEOUT_MS = 3000; // Flaky Wi-Fi: fall back to the cached copy instead of hanging
+
+const SHELL_ASSETS = [
+    './',
+    'index.html',
+    'summary.html',
+    'app.js',
+    'offline.js',
+    'summary.js',
+    'output.css',
+    'styles.css',
+    'symbol_ci.svg',
+    'logo.svg',
+    'lges.png'
+];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE).then(cache =>
+            // Add one by one so a missing optional asset (e.g. unbuilt CSS) doesn't abort the install
+            Promise.all(SHELL_ASSETS.map(asset => cache.add(asset).catch(() => null)))
+        ).then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil(
+        caches.keys().then(keys => Promise.all(
+            keys
+                .filter(key => key.startsWith('cs-checklist-') && key !== SHELL_CACHE && key !== API_CACHE)
+                .map(key => caches.delete(key))
+        )).then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    // Mutations go straight to the network; offline.js queues them when that fails
+    if (request.method !== 'GET' || url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (url.pathname.startsWith('/api/')) {
+        if (url.pathname === '/api/checklist/items' || url.pathname === '/api/checklist/items/search') {
+            // Master list rarely changes: answer instantly from cache, refresh in the background
+            event.respondWith(staleWhileRevalidate(event, request));
+        } else {
+            event.respondWith(networkFirst(event, request, url));
+        }
+        return;
+    }
+
+    event.respondWith(staleWhileRevalidate(event, request, SHELL_CACHE));
+});
+
+async function staleWhileRevalidate(event, request, cacheName = API_CACHE) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(request);
+    const network = fetch(request).then(response => {
+        if (response.ok) {
+            cache.put(request, response.clone());
+        }
+        return response;
+    });
+
+    if (cached) {
+        event.waitUntil(network.catch(() => null));
+        return cached;
+    }
+    return network;
+}
+
+async function networkFirst(event, request, url) {
+    const cache = await caches.open(API_CACHE);
+    const network = fetch(request).then(async response => {
+        if (response.ok) {
+            await cache.put(request, response.clone());
+            if (url.pathname === '/api/checklist') {
+                await pruneDayDocuments(cache);
+            }
+        }
+        return response;
+    });
+    const timeout = new Promise(resolve => setTimeout(() => resolve(null), NETWORK_TIMEOUT_MS));
+
+    try {
+        const response = await Promise.race([network, timeout]);
+        if (response) {
+            return response;
+        }
+        // Network is slow: answer from cache when possible and let the request refresh it later
+        const cached = await cache.match(request);
+        if (cached) {
+            event.waitUntil(network.catch(() => null));
+            return cached;
+        }
+        return await network;
+    } catch (error) {
+        const cached = await cache.match(request);
+        if (cached) {
+            return cached;
+        }
+        return new Response(JSON.stringify({ error: 'Offline and no cached copy available' }), {
+            status: 503,
+            headers: { 'Content-Type': 'application/json' }
+        });
+    }
+}
+
+// Keep only the most recent day documents (keys are /api/checklist?date=YYYY-MM-DD_LineN)
+async function pruneDayDocuments(cache) {
+    const keys = await cache.keys();
+    const dayKeys = keys
+        .map(request => ({ request, date: new URL(request.url).searchParams.get('date') }))
+        .filter(entry => new URL(entry.request.url).pathname === '/api/checklist' && entry.date)
+        .sort((a, b) => b.date.localeCompare(a.date));
+
+    await Promise.all(dayKeys.slice(MAX_CACHED_DAY_DOCS).map(entry => cache.delete(entry.request)));
+}
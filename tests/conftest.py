@@ -0,0 +1,186 @@
+"""
+Shared fixtures: an in-memory stand-in for the Firestore client used by api/index.py.
+Only the calls the API makes are implemented (documents, subcollections, merge sets with
+sentinels, document-ID range filters, ordering, paging and batches).
+"""
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+from firebase_admin import firestore
+from google.cloud.firestore_v1.transforms import ArrayRemove, ArrayUnion, Increment
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api'))
+
+import index  # noqa: E402
+
+
+def resolve_value(current, value):
+    """Applies Firestore sentinels (server timestamp, increment, array union/remove) to a written value."""
+    if value is firestore.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, ArrayUnion):
+        current = list(current) if isinstance(current, list) else []
+        return current + [element for element in value.values if element not in current]
+    if isinstance(value, ArrayRemove):
+        return [element for element in (current or []) if element not in value.values]
+    if isinstance(value, dict):
+        return {key: resolve_value(None, nested) for key, nested in value.items() if nested is not firestore.DELETE_FIELD}
+    return value
+
+
+def merge_into(target, data):
+    for key, value in data.items():
+        if value is firestore.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_into(target[key], value)
+        else:
+            target[key] = resolve_value(target.get(key), value)
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self):
+        return None if self._data is None else resolve_value(None, self._data)
+
+
+class FakeDocument:
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self.id = path[-1]
+
+    def _store(self):
+        return self.client.collections.setdefault(self.path[:-1], {})
+
+    def collection(self, name):
+        return FakeCollection(self.client, self.path + (name,))
+
+    def get(self):
+        data = self._store().get(self.id)
+        return FakeSnapshot(self, data, self.client.update_times.get(self.path))
+
+    def set(self, data, merge=False):
+        self.client.writes.append((self.path, data, merge))
+        store = self._store()
+        if merge and self.id in store:
+            merge_into(store[self.id], data)
+        else:
+            store[self.id] = {}
+            merge_into(store[self.id], data)
+        self.client.update_times[self.path] = datetime.now(timezone.utc)
+
+    def delete(self):
+        self._store().pop(self.id, None)
+
+
+class FakeQuery:
+    def __init__(self, client, path, filters=(), order=None, limit=None, start_after=None):
+        self.client = client
+        self.path = path
+        self.filters = list(filters)
+        self.order = order
+        self._limit = limit
+        self._start_after = start_after
+
+    def _copy(self, **changes):
+        state = dict(filters=self.filters, order=self.order, limit=self._limit, start_after=self._start_after)
+        state.update(changes)
+        return FakeQuery(self.client, self.path, **state)
+
+    def where(self, filter):
+        value = filter.value.id if isinstance(filter.value, FakeDocument) else filter.value
+        return self._copy(filters=self.filters + [(filter.field_path, filter.op_string, value)])
+
+    def order_by(self, field):
+        return self._copy(order=field)
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, snapshot):
+        return self._copy(start_after=snapshot)
+
+    def stream(self):
+        self.client.queries.append(self)
+        store = self.client.collections.get(self.path, {})
+        field = self.order or '__name__'
+
+        def sort_value(doc_id):
+            return doc_id if field == '__name__' else store[doc_id].get(field)
+
+        matches = []
+        for doc_id in sorted(store, key=sort_value):
+            keep = True
+            for filter_field, op, value in self.filters:
+                actual = doc_id if filter_field == '__name__' else store[doc_id].get(filter_field)
+                keep = keep and {'>=': actual >= value, '<=': actual <= value, '==': actual == value}[op]
+            if keep:
+                matches.append(doc_id)
+        if self._start_after is not None:
+            after = sort_value(self._start_after.id)
+            matches = [doc_id for doc_id in matches if sort_value(doc_id) > after]
+        if self._limit is not None:
+            matches = matches[:self._limit]
+        return iter([FakeDocument(self.client, self.path + (doc_id,)).get() for doc_id in matches])
+
+
+class FakeCollection(FakeQuery):
+    _auto_id = 0
+
+    def document(self, doc_id=None):
+        if doc_id is None:
+            FakeCollection._auto_id += 1
+            doc_id = f"auto{FakeCollection._auto_id:06d}"
+        return FakeDocument(self.client, self.path + (doc_id,))
+
+
+class FakeBatch:
+    def __init__(self):
+        self.operations = []
+
+    def set(self, reference, data):
+        self.operations.append((reference, data))
+
+    def commit(self):
+        for reference, data in self.operations:
+            reference.set(data)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.collections = {}  # {collection path tuple: {doc_id: data}}
+        self.update_times = {}
+        self.writes = []
+        self.queries = []
+
+    def collection(self, name):
+        return FakeCollection(self, (name,))
+
+    def batch(self):
+        return FakeBatch()
+
+    def docs(self, name):
+        return self.collections.setdefault((name,), {})
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeFirestore()
+    monkeypatch.setattr(index, 'db', db)
+    index.pending_patches.clear()
+    index.summary_cache.clear()
+    index.summary_inflight.clear()
+    index.analytics_month_cache.clear()
+    index.item_index_cache = {}
+    return db
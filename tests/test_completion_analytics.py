@@ -0,0 +1,133 @@
+import asyncio
+import json
+from datetime import date, timedelta
+
+import pytest
+
+import index
+
+
+class FakeRequest:
+    headers = {}
+
+
+def seed_items(fake_db, items):
+    fake_db.docs('config')['checklist_items'] = {'items': items}
+
+
+def analytics(**params):
+    params.setdefault('bucket', 'month')
+    params.setdefault('line', None)
+    response = asyncio.run(index.get_completion_analytics(FakeRequest(), **params))
+    return json.loads(response.body)
+
+
+def test_month_aggregate_sets_one_bit_per_checked_day(fake_db):
+    checklists = fake_db.docs('checklists')
+    checklists['2025-03-01_Line1'] = {'checked': {'i1': {'a': {'checked': True}, 'b': {'checked': True}}}}
+    checklists['2025-03-03_Line1'] = {'checked': {'i1': {'a': {'checked': True}}, 'i2': {'a': {'note': 'not checked'}}}}
+    checklists['2025-03-31'] = {'checked': {}}
+
+    aggregate = index.compute_month_aggregate('2025-03')
+
+    assert aggregate['Line1']['items'] == {'i1': 0b101}
+    assert aggregate['Line1']['users'] == {'a': 2, 'b': 1}
+    assert aggregate['Line1']['days'] == 0b101
+    assert aggregate[index.LEGACY_LINE]['days'] == 1 << 30
+    assert index.month_day_dates('2025-03', 0b101) == [date(2025, 3, 1), date(2025, 3, 3)]
+
+
+def test_rates_and_overdue_streaks(fake_db):
+    seed_items(fake_db, [{'id': 'daily', 'periodDays': 1}, {'id': 'weekly', 'periodDays': 7}])
+    checklists = fake_db.docs('checklists')
+    # Daily item checked on odd days, weekly item on the 1st and 20th of a past 30-day month
+    for day in range(1, 31):
+        doc = checklists.setdefault(f'2025-06-{day:02d}_Line1', {'checked': {}})
+        if day % 2:
+            doc['checked']['daily'] = {'a': {'checked': True}}
+        if day in (1, 20):
+            doc['checked']['weekly'] = {'b': {'checked': True}}
+
+    result = analytics(start_month='2025-06', end_month='2025-06', line='Line1')
+
+    month = result['buckets']['2025-06']
+    assert month['items']['daily'] == {'completed': 15, 'expected': 30.0, 'rate': 0.5}
+    assert month['items']['weekly']['completed'] == 2
+    # 34.29 checks expected: 30 daily + 30/7 weekly
+    assert month['users'] == {
+        'a': {'checks': 15, 'share': 0.8824, 'rate': 0.4375},
+        'b': {'checks': 2, 'share': 0.1176, 'rate': 0.0583}
+    }
+    assert result['overdue']['Line1']['daily'] == {
+        'lastCompleted': '2025-06-29', 'longestOverdueDays': 1, 'currentOverdueDays': 0
+    }
+    # 1st -> 20th is 19 days for a 7-day item: 12 days overdue
+    assert result['overdue']['Line1']['weekly']['longestOverdueDays'] == 12
+
+
+def test_idle_lines_report_a_zero_rate(fake_db):
+    seed_items(fake_db, [{'id': 'daily', 'periodDays': 1}])
+    fake_db.docs('checklists')['2025-06-02_Line1'] = {'checked': {'daily': {'a': {'checked': True}}}}
+
+    result = analytics(start_month='2025-06', end_month='2025-06')
+
+    lines = result['buckets']['2025-06']['lines']
+    assert set(index.PRODUCTION_LINES) <= set(lines)
+    assert lines['Line3'] == {'completed': 0, 'expected': 30.0, 'rate': 0.0}
+    assert result['overdue']['Line3']['daily']['lastCompleted'] is None
+
+
+def test_overdue_streaks_start_from_the_last_earlier_completion(fake_db):
+    seed_items(fake_db, [{'id': 'weekly', 'periodDays': 7}, {'id': 'never', 'periodDays': 7}])
+    checklists = fake_db.docs('checklists')
+    checklists['2025-04-20_Line1'] = {'checked': {'weekly': {'a': {'checked': True}}}}
+    checklists['2025-06-10_Line1'] = {'checked': {'weekly': {'a': {'checked': True}}}}
+
+    result = analytics(start_month='2025-06', end_month='2025-06', line='Line1')
+
+    weekly = result['overdue']['Line1']['weekly']
+    # 04-20 -> 06-10 is 51 days for a 7-day item, not the 10 days since the range started
+    assert weekly['longestOverdueDays'] == 44
+    assert weekly['lastCompleted'] == '2025-06-10'
+    never = result['overdue']['Line1']['never']
+    assert never == {'lastCompleted': None, 'longestOverdueDays': 23, 'currentOverdueDays': 23}
+
+
+def test_quarter_buckets_group_months(fake_db):
+    seed_items(fake_db, [{'id': 'daily', 'periodDays': 1}])
+
+    result = analytics(start_month='2025-01', end_month='2025-06', bucket='quarter', line='Line1')
+
+    assert list(result['buckets']) == ['2025-Q1', '2025-Q2']
+    assert result['buckets']['2025-Q1']['days'] == 90
+
+
+def test_archived_months_are_cached(fake_db):
+    seed_items(fake_db, [{'id': 'daily', 'periodDays': 1}])
+    fake_db.docs('checklists')['2025-06-02_Line1'] = {'checked': {'daily': {'a': {'checked': True}}}}
+    fake_db.docs('config')['archive_state'] = {'compactedThrough': '2025-06'}
+    index.compact_month('2025-06')
+
+    analytics(start_month='2025-06', end_month='2025-06')
+    assert '2025-06' in fake_db.docs('analytics_months')
+    fake_db.queries.clear()
+    analytics(start_month='2025-06', end_month='2025-06')
+
+    # Only the oldest-day lookup that bounds the overdue seeding walk; no history scans
+    assert [(query.path, query._limit) for query in fake_db.queries] == [(('checklists',), 1)]
+
+
+@pytest.mark.parametrize('start_month,end_month', [('2025-6', '2025-07'), ('2025-13', '2025-12'), ('x', 'y')])
+def test_malformed_months_are_rejected(fake_db, start_month, end_month):
+    with pytest.raises(index.HTTPException) as error:
+        analytics(start_month=start_month, end_month=end_month)
+    assert error.value.status_code == 400
+
+
+def test_future_months_are_skipped(fake_db):
+    seed_items(fake_db, [{'id': 'daily', 'periodDays': 1}])
+    next_year = (date.today() + timedelta(days=400)).strftime('%Y-%m')
+
+    result = analytics(start_month=next_year, end_month=next_year)
+
+    assert result['buckets'] == {}
@@ -0,0 +1,124 @@
+import asyncio
+import json
+from datetime import datetime
+
+import pytest
+
+import index
+
+
+def seed_days(fake_db):
+    checklists = fake_db.docs('checklists')
+    checklists['2025-11-03_Line1'] = {'checked': {'i1': {'u': {'checked': True, 'note': 'n', 'photos': [{}, {}]}}}}
+    checklists['2025-12-30_Line2'] = {'checked': {'i2': {'u': {'checked': True}}}}
+    checklists['2026-01-02'] = {'checked': {'i1': {'u': {'checked': True}}}}
+    current_month = datetime.now().strftime('%Y-%m')
+    checklists[f'{current_month}-01_Line1'] = {'checked': {'i3': {'u': {'checked': True}}}}
+    return current_month
+
+
+def compact_all():
+    response = asyncio.run(index.compact_history({}))
+    return json.loads(response.body)
+
+
+def test_next_month_wraps_the_year():
+    assert index.next_month('2025-12') == '2026-01'
+    assert index.next_month('2026-01') == '2026-02'
+
+
+def test_compaction_folds_each_closed_month_per_line(fake_db):
+    current_month = seed_days(fake_db)
+
+    result = compact_all()
+
+    archives = fake_db.docs('checklist_archives')
+    assert set(archives) == {'2025-11_Line1', '2025-12_Line2', '2026-01'}
+    assert archives['2025-11_Line1']['days'] == {
+        '2025-11-03': {'i1': {'u': {'checked': True, 'note': 'n', 'photoCount': 2}}}
+    }
+    assert index.next_month(result['compactedThrough']) == current_month
+    assert fake_db.docs('config')['archive_state']['compactedThrough'] == result['compactedThrough']
+
+
+def test_history_reads_split_between_archives_and_live_docs(fake_db):
+    current_month = seed_days(fake_db)
+    compact_all()
+    # Archived days are read from the archive, never from the daily docs
+    fake_db.docs('checklists')['2025-12-30_Line2'] = {'checked': {}}
+    fake_db.queries.clear()
+
+    days = list(index.iter_history_days('2025-12-01', '2026-01-31'))
+
+    assert days == [
+        ('2025-12-30', 'Line2', {'i2': {'u': {'checked': True}}}),
+        ('2026-01-02', '', {'i1': {'u': {'checked': True}}}),
+    ]
+    assert [query.path for query in fake_db.queries] == [('checklist_archives',)]
+
+    live_days = list(index.iter_history_days(f'{current_month}-01', f'{current_month}-31'))
+    assert live_days == [(f'{current_month}-01', 'Line1', {'i3': {'u': {'checked': True}}})]
+
+
+def test_last_completions_match_before_and_after_compaction(fake_db):
+    seed_days(fake_db)
+    before = index.collect_last_completions()
+
+    compact_all()
+
+    assert index.collect_last_completions() == before
+    assert before['i1'] == '2026-01-02'
+
+
+def test_recompacting_picks_up_edits_to_an_archived_day(fake_db):
+    seed_days(fake_db)
+    compact_all()
+    fake_db.docs('checklists')['2025-12-30_Line2']['checked']['i9'] = {'v': {'checked': True}}
+
+    asyncio.run(index.compact_history({'month': '2025-12'}))
+
+    assert 'i9' in fake_db.docs('checklist_archives')['2025-12_Line2']['days']['2025-12-30']
+
+
+def test_writes_to_an_archived_month_are_served_until_recompacted(fake_db):
+    seed_days(fake_db)
+    compact_all()
+
+    asyncio.run(index.update_checklist({'date': '2025-12-30_Line2', 'checked': {'i9': {'v': {'checked': True}}}}))
+
+    assert fake_db.docs('config')['archive_state']['dirtyMonths'] == ['2025-12']
+    days = dict((date, checked) for date, _line, checked in index.iter_history_days('2025-12-01', '2025-12-31'))
+    assert 'i9' in days['2025-12-30']
+    assert index.collect_last_completions()['i9'] == '2025-12-30'
+
+    # The scheduled run re-archives dirty months along with newly closed ones
+    result = compact_all()
+
+    assert result['archived']['2025-12'] == ['2025-12_Line2']
+    assert fake_db.docs('config')['archive_state']['dirtyMonths'] == []
+    assert 'i9' in fake_db.docs('checklist_archives')['2025-12_Line2']['days']['2025-12-30']
+
+
+@pytest.mark.parametrize('month', ['2025-13', '2025-1', 'latest'])
+def test_malformed_months_are_rejected(fake_db, month):
+    with pytest.raises(index.HTTPException) as error:
+        asyncio.run(index.compact_history({'month': month}))
+    assert error.value.status_code == 400
+
+
+class FakeRequest:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_cron_route_requires_the_cron_secret(fake_db, monkeypatch):
+    seed_days(fake_db)
+    monkeypatch.setenv('CRON_SECRET', 's3cret')
+
+    with pytest.raises(index.HTTPException) as error:
+        asyncio.run(index.compact_history_cron(FakeRequest({})))
+    assert error.value.status_code == 401
+
+    response = asyncio.run(index.compact_history_cron(FakeRequest({'authorization': 'Bearer s3cret'})))
+    assert json.loads(response.body)['success'] is True
+    assert '2025-11_Line1' in fake_db.docs('checklist_archives')
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+import index
+
+
+class FakeRequest:
+    headers = {}
+
+
+ITEMS = [
+    {'id': 'a1', 'process': '음극', 'equipment': '포일', 'category': 'S/W', 'periodDays': 7, 'order': 1},
+    {'id': 'a2', 'process': '음극', 'equipment': '공통', 'category': 'S/W', 'periodDays': 1, 'order': 2},
+    {'id': 'c1', 'process': '양극', 'equipment': 'NG mark', 'category': '정합성', 'periodDays': 30, 'order': 3},
+    {'id': 'c2', 'process': '양극', 'equipment': '공통', 'category': 'H/W & 클리닝', 'order': 4},
+]
+
+
+def search(fake_db, items=ITEMS, **params):
+    fake_db.docs('config')['checklist_items'] = {'items': items}
+    params = {'process': 'all', 'equipment': 'all', 'category': 'all', 'period': 'all',
+              'offset': 0, 'limit': 200, **params}
+    response = asyncio.run(index.search_checklist_items(FakeRequest(), **params))
+    return json.loads(response.body)
+
+
+def test_results_follow_checklist_order(fake_db):
+    result = search(fake_db)
+
+    # 정합성 first, then by period with unset periods last
+    assert [item['id'] for item in result['items']] == ['c1', 'a2', 'a1', 'c2']
+    assert result['ids'] == ['c1', 'a2', 'a1', 'c2']
+    assert result['total'] == result['indexTotal'] == 4
+
+
+def test_equipment_filter_includes_common_items(fake_db):
+    result = search(fake_db, equipment='포일')
+
+    assert result['ids'] == ['a2', 'a1', 'c2']
+    assert result['facets']['equipment'] == {'포일': 3, '공통': 2, 'NG mark': 3}
+
+
+def test_facets_apply_the_other_filters(fake_db):
+    result = search(fake_db, process='음극', period='7')
+
+    assert result['ids'] == ['a1']
+    assert result['facets']['process'] == {'음극': 1, '양극': 0}
+    assert result['facets']['period'] == {'1': 1, '7': 1, '30': 0, 'custom': 0}
+    assert result['facets']['equipment']['포일'] == 1
+
+
+def test_empty_filter_result_still_reports_the_index_size(fake_db):
+    result = search(fake_db, process='음극', category='정합성')
+
+    assert result['items'] == [] and result['ids'] == []
+    assert result['indexTotal'] == 4
+
+
+def test_pages_cover_every_match(fake_db):
+    first = search(fake_db, limit=3)
+    second = search(fake_db, offset=first['nextOffset'], limit=3)
+
+    assert [item['id'] for item in first['items'] + second['items']] == first['ids']
+    assert second['nextOffset'] is None
+
+
+def test_index_is_rebuilt_when_the_master_list_changes(fake_db):
+    version = search(fake_db)['version']
+    cached = index.item_index_cache
+
+    assert search(fake_db)['indexTotal'] == 4
+    assert index.item_index_cache is cached
+
+    fake_db.collection('config').document('checklist_items').set({'items': ITEMS[:1]})
+    assert index.fetch_item_index()['items'] == ITEMS[:1]
+    assert index.item_index_cache['version'] != version
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import pytest
+from firebase_admin import firestore
+
+import index
+
+
+class FakeRequest:
+    headers = {}
+
+
+@pytest.fixture(autouse=True)
+def short_window(monkeypatch):
+    monkeypatch.setattr(index, 'PATCH_COALESCE_SECONDS', 0.01)
+
+
+def run_patches(*payloads):
+    async def main():
+        return await asyncio.gather(*(index.patch_checklist(payload) for payload in payloads))
+    return asyncio.run(main())
+
+
+def checklist_writes(fake_db):
+    return [data for path, data, _merge in fake_db.writes if path[0] == 'checklists']
+
+
+def test_rapid_edits_to_one_day_are_written_once(fake_db):
+    responses = run_patches(
+        {'date': 'd1', 'item_id': 'a', 'user': 'u', 'note': 'x'},
+        {'date': 'd1', 'item_id': 'a', 'user': 'u', 'note': 'xy'},
+        {'date': 'd1', 'item_id': 'b', 'user': 'u', 'checked': True},
+    )
+
+    assert all(json.loads(response.body) == {'success': True} for response in responses)
+    writes = checklist_writes(fake_db)
+    assert len(writes) == 1
+    assert writes[0]['checked']['a'] == {'u': {'note': 'xy'}}
+    assert writes[0]['checked']['b']['u']['checked'] is True
+    assert writes[0]['checked']['b']['u']['timestamp'] is firestore.SERVER_TIMESTAMP
+
+
+def test_patch_only_touches_the_given_fields(fake_db):
+    fake_db.docs('checklists')['d1'] = {
+        'items': ['kept'],
+        'checked': {'a': {'u': {'checked': True, 'note': 'old', 'photoCount': 2}, 'v': {'checked': True}}}
+    }
+
+    run_patches({'date': 'd1', 'item_id': 'a', 'user': 'u', 'note': 'new'})
+
+    doc = fake_db.docs('checklists')['d1']
+    assert doc['items'] == ['kept']
+    assert doc['checked']['a']['u'] == {'checked': True, 'note': 'new', 'photoCount': 2}
+    assert doc['checked']['a']['v'] == {'checked': True}
+
+
+def test_uncheck_then_note_edit_keeps_the_delete(fake_db):
+    fake_db.docs('checklists')['d1'] = {'checked': {'a': {'u': {'checked': True, 'note': 'old'}}}}
+
+    run_patches(
+        {'date': 'd1', 'item_id': 'a', 'user': 'u', 'checked': False},
+        {'date': 'd1', 'item_id': 'a', 'user': 'u', 'note': 'x'},
+    )
+
+    assert 'u' not in fake_db.docs('checklists')['d1']['checked']['a']
+
+
+def test_uncheck_then_recheck_writes_a_full_entry(fake_db):
+    run_patches(
+        {'date': 'd1', 'item_id': 'a', 'user': 'u', 'checked': False},
+        {'date': 'd1', 'item_id': 'a', 'user': 'u', 'checked': True, 'note': 'again'},
+    )
+
+    entry = checklist_writes(fake_db)[0]['checked']['a']['u']
+    assert entry['checked'] is True
+    assert entry['note'] == 'again'
+    assert entry['timestamp'] is firestore.SERVER_TIMESTAMP
+
+
+def test_patch_without_fields_is_rejected(fake_db):
+    with pytest.raises(index.HTTPException) as error:
+        run_patches({'date': 'd1', 'item_id': 'a', 'user': 'u'})
+    assert error.value.status_code == 400
+
+
+def test_unchecking_the_last_user_reads_back_as_unchecked(fake_db):
+    fake_db.docs('checklists')['d1'] = {'checked': {'a': {'u': {'checked': True}}, 'b': {'v': {'checked': True}}}}
+
+    run_patches({'date': 'd1', 'item_id': 'a', 'user': 'u', 'checked': False})
+    response = asyncio.run(index.get_checklist(FakeRequest(), date='d1'))
+
+    assert json.loads(response.body)['checked'] == {'b': {'v': {'checked': True}}}
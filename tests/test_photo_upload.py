@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import pytest
+
+import index
+
+
+class FakeBlob:
+    def __init__(self, name):
+        self.public_url = f'https://storage.example/{name}'
+
+    def upload_from_string(self, contents, content_type):
+        pass
+
+    def make_public(self):
+        pass
+
+
+class FakeBucket:
+    def blob(self, name):
+        return FakeBlob(name)
+
+
+class FakeUpload:
+    filename = 'shot.jpg'
+    content_type = 'image/jpeg'
+
+    async def read(self):
+        return b'jpeg'
+
+
+@pytest.fixture(autouse=True)
+def fake_bucket(monkeypatch):
+    monkeypatch.setattr(index, 'storage_bucket', FakeBucket())
+
+
+def upload(user='u'):
+    return asyncio.run(index.upload_photo(file=FakeUpload(), date='2025-03-03_Line1', item_id='i1', user=user))
+
+
+def test_first_photo_checks_the_item(fake_db):
+    upload()
+
+    entry = fake_db.docs('checklists')['2025-03-03_Line1']['checked']['i1']['u']
+    assert entry['checked'] is True
+    assert entry['photoCount'] == 1
+    assert 'timestamp' in entry
+    photos = fake_db.collections[('checklists', '2025-03-03_Line1', 'photos', 'i1', 'entries')]
+    assert [photo['user'] for photo in photos.values()] == ['u']
+
+
+def test_later_photos_only_bump_the_count(fake_db):
+    fake_db.docs('checklists')['2025-03-03_Line1'] = {
+        'checked': {'i1': {'u': {'checked': True, 'note': 'n', 'timestamp': 'earlier', 'photoCount': 1}}}
+    }
+
+    upload()
+
+    entry = fake_db.docs('checklists')['2025-03-03_Line1']['checked']['i1']['u']
+    assert entry == {'checked': True, 'note': 'n', 'timestamp': 'earlier', 'photoCount': 2}
+
+
+class FakeRequest:
+    headers = {}
+
+
+def read_day(date='2025-03-03_Line1'):
+    return json.loads(asyncio.run(index.get_checklist(FakeRequest(), date=date)).body)
+
+
+def list_photos(**params):
+    params = {'date': '2025-03-03_Line1', 'item_id': 'i1', 'limit': 2, 'cursor': None, **params}
+    return json.loads(asyncio.run(index.list_photos(FakeRequest(), **params)).body)
+
+
+def seed_photos(fake_db, count):
+    entries = fake_db.collections.setdefault(('checklists', '2025-03-03_Line1', 'photos', 'i1', 'entries'), {})
+    for number in range(count):
+        entries[f'p{number}'] = {'url': f'https://storage.example/p{number}', 'user': 'u', 'uploaded_at': f'2025-03-03T08:0{number}:00'}
+
+
+def test_submit_does_not_double_legacy_photo_counts(fake_db):
+    fake_db.docs('checklists')['2025-03-03_Line1'] = {
+        'checked': {'i1': {'u': {'checked': True, 'photos': [{'url': 'a'}, {'url': 'b'}]}}}
+    }
+    checked = read_day()['checked']
+    assert checked['i1']['u']['photoCount'] == 2
+
+    asyncio.run(index.update_checklist({'date': '2025-03-03_Line1', 'checked': checked}))
+
+    assert read_day()['checked']['i1']['u']['photoCount'] == 2
+    assert index.compact_checked(fake_db.docs('checklists')['2025-03-03_Line1']['checked'])['i1']['u']['photoCount'] == 2
+
+
+def test_photo_pages_follow_the_cursor(fake_db):
+    seed_photos(fake_db, 5)
+
+    pages = [list_photos()]
+    while pages[-1]['nextCursor']:
+        pages.append(list_photos(cursor=pages[-1]['nextCursor']))
+
+    assert [[photo['id'] for photo in page['photos']] for page in pages] == [['p0', 'p1'], ['p2', 'p3'], ['p4']]
+
+
+def test_legacy_photos_lead_the_first_page_only(fake_db):
+    fake_db.docs('checklists')['2025-03-03_Line1'] = {
+        'checked': {'i1': {'v': {'checked': True, 'photos': [{'url': 'legacy', 'uploaded_at': '2024-12-01T00:00:00'}]}}}
+    }
+    seed_photos(fake_db, 3)
+
+    first = list_photos()
+    second = list_photos(cursor=first['nextCursor'])
+
+    assert first['photos'][0] == {'user': 'v', 'url': 'legacy', 'uploaded_at': '2024-12-01T00:00:00'}
+    assert [photo.get('id') for photo in first['photos'][1:]] == ['p0', 'p1']
+    assert [photo['id'] for photo in second['photos']] == ['p2']
+    assert second['nextCursor'] is None
+
+
+def test_unknown_cursor_is_rejected(fake_db):
+    with pytest.raises(index.HTTPException) as error:
+        list_photos(cursor='missing')
+    assert error.value.status_code == 400
@@ -0,0 +1,51 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import msgpack
+import pytest
+from fastapi.responses import JSONResponse
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+import index
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+from bench_serialization import build_day_document, make_json_serializable  # noqa: E402
+
+
+class FakeRequest:
+    def __init__(self, accept=''):
+        self.headers = {'accept': accept} if accept else {}
+
+
+def test_json_bytes_match_the_previous_encoder():
+    doc = build_day_document(20, 3, 2)
+    doc['checked']['item_0']['user_0']['timestamp'] = DatetimeWithNanoseconds(2025, 3, 3, 8, 30, 0, 123456, tzinfo=timezone.utc)
+    doc['checked']['item_1']['user_0']['timestamp'] = datetime(2025, 3, 3, 8, 30, tzinfo=timezone(timedelta(hours=9)))
+    doc['lastUpdated'] = datetime(2025, 3, 3, 8, 30, 5)
+    doc['period_checks'] = {1: 3, 7: 0}
+
+    assert index.FastJSONResponse(doc).body == JSONResponse(make_json_serializable(doc)).body
+
+
+@pytest.mark.parametrize('accept,media_type', [
+    ('', 'application/json'),
+    ('application/json', 'application/json'),
+    ('application/x-msgpack, application/json;q=0.5', 'application/x-msgpack'),
+])
+def test_accept_header_selects_the_encoding(accept, media_type):
+    response = index.serialized_response({'a': 1}, FakeRequest(accept))
+
+    assert response.media_type == media_type
+    assert response.headers['vary'] == 'Accept'
+
+
+def test_day_document_round_trips_through_msgpack(fake_db):
+    stamp = datetime(2025, 3, 3, 8, 30, tzinfo=timezone.utc)
+    fake_db.docs('checklists')['2025-03-03_Line1'] = {'checked': {'i1': {'u': {'checked': True, 'timestamp': stamp}}}}
+
+    response = asyncio.run(index.get_checklist(FakeRequest('application/x-msgpack'), date='2025-03-03_Line1'))
+
+    assert msgpack.unpackb(response.body) == {'checked': {'i1': {'u': {'checked': True, 'timestamp': stamp.isoformat()}}}}
@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import index
+
+
+class FakeRequest:
+    headers = {}
+
+
+def seed(fake_db):
+    fake_db.docs('config')['checklist_items'] = {'items': [{'id': 'weekly', 'periodDays': 7}]}
+    fake_db.docs('checklists')['2025-03-03_Line1'] = {'checked': {'weekly': {'u': {'checked': True}}}}
+
+
+def calendar(start_date='2025-03-01', end_date='2025-03-31'):
+    response = asyncio.run(index.get_calendar_summary(FakeRequest(), start_date, end_date))
+    return json.loads(response.body)
+
+
+def check(date, item_id='weekly', user='u'):
+    asyncio.run(index.update_checklist({'date': date, 'checked': {item_id: {user: {'checked': True}}}}))
+
+
+def count_calls(monkeypatch, name):
+    calls = []
+    original = getattr(index, name)
+
+    def counting(*args):
+        calls.append(args)
+        return original(*args)
+    monkeypatch.setattr(index, name, counting)
+    return calls
+
+
+def test_concurrent_requests_share_one_computation(fake_db, monkeypatch):
+    seed(fake_db)
+    calls = count_calls(monkeypatch, 'build_calendar_summary')
+
+    async def main():
+        return await asyncio.gather(*(
+            index.get_calendar_summary(FakeRequest(), '2025-03-01', '2025-03-31') for _ in range(5)
+        ))
+    responses = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert len({response.body for response in responses}) == 1
+    assert not index.summary_inflight
+
+
+def test_summary_counts_checks_once_per_line_doc(fake_db):
+    seed(fake_db)
+    fake_db.docs('checklists')['2025-03-03_Line2'] = {'checked': {'weekly': {'u': {'checked': True}, 'v': {'checked': True}}}}
+    fake_db.docs('checklists')['2025-03-04_Line1'] = {'checked': {'weekly': {'u': {'note': 'only a note'}}}}
+
+    data = calendar()['summaryData']
+
+    assert data['2025-03-03']['total_checked'] == 2
+    assert data['2025-03-03']['period_checks'] == {'7': 2}
+    assert data['2025-03-04']['submitted'] is True and data['2025-03-04']['total_checked'] == 0
+    assert data['2025-03-05']['submitted'] is False
+
+
+def test_write_to_another_month_keeps_the_cached_calendar(fake_db, monkeypatch):
+    seed(fake_db)
+    calls = count_calls(monkeypatch, 'build_calendar_summary')
+    calendar()
+
+    # Older than the stored last completion, so March's due counts don't move
+    check('2025-01-10_Line1')
+    calendar()
+
+    assert len(calls) == 1
+
+
+def test_moved_last_completion_reuses_past_month_aggregates(fake_db, monkeypatch):
+    seed(fake_db)
+    computed = count_calls(monkeypatch, 'compute_month_aggregate')
+    assert calendar()['summaryData']['2025-03-05']['total_due'] == 0
+
+    # A newer completion in a later month changes March's due counts through last completions
+    check('2025-04-02_Line1')
+
+    assert fake_db.docs('config')['last_completions']['items'] == {'weekly': '2025-04-02'}
+    assert calendar()['summaryData']['2025-03-05']['total_due'] == 1
+    assert computed == [('2025-03',)]
+
+
+def test_unchecking_the_last_completion_finds_the_previous_one(fake_db):
+    seed(fake_db)
+    fake_db.docs('checklists')['2025-03-10_Line2'] = {'checked': {'weekly': {'v': {'checked': True}}}}
+    assert index.fetch_last_completions() == {'weekly': '2025-03-10'}
+
+    asyncio.run(index.toggle_check({'date': '2025-03-10_Line2', 'item_id': 'weekly', 'user': 'v'}, FakeRequest()))
+
+    assert index.fetch_last_completions() == {'weekly': '2025-03-03'}
+
+
+def test_writes_from_another_instance_are_seen(fake_db):
+    seed(fake_db)
+    assert calendar()['summaryData']['2025-03-05']['total_checked'] == 0
+
+    # Another instance wrote the day and bumped the month's marker; this instance's caches are untouched
+    fake_db.docs('checklists')['2025-03-05_Line1'] = {'checked': {'weekly': {'u': {'checked': True}}}}
+    fake_db.docs(index.WRITE_MARKER_COLLECTION)['2025-03'] = {'writes': 1}
+
+    assert calendar()['summaryData']['2025-03-05']['total_checked'] == 1
+
+
+def test_compacting_a_month_invalidates_its_summaries(fake_db, monkeypatch):
+    seed(fake_db)
+    calls = count_calls(monkeypatch, 'build_calendar_summary')
+    calendar()
+
+    index.compact_month('2025-03')
+    calendar()
+
+    assert len(calls) == 2
+
+
+def test_lru_evicts_the_oldest_entry(fake_db, monkeypatch):
+    monkeypatch.setattr(index, 'SUMMARY_CACHE_SIZE', 2)
+
+    async def main():
+        for key in ('a', 'b', 'c'):
+            await index.single_flight(('calendar', key, key), lambda: key)
+    asyncio.run(main())
+
+    assert [key[1] for key in index.summary_cache] == ['b', 'c']